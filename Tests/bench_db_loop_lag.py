@@ -0,0 +1,84 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+Event loop lag while lots of "commands" hit the db at once.
+
+Blocking = the old utils.sqlite.Database called straight from coroutines
+Async    = utils.sqlite.AsyncDatabase
+
+run from the repo root: python -m Tests.bench_db_loop_lag
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import sqlite  # noqa: E402
+
+COMMANDS = 50
+QUERIES_PER_COMMAND = 20
+PROBE_INTERVAL = 0.005
+
+
+async def probe(lags, stop):
+    """ Sleeps for a fixed interval and records how late it woke up """
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append((time.perf_counter() - start - PROBE_INTERVAL) * 1000)
+
+
+async def command(db, n, is_async):
+    for i in range(QUERIES_PER_COMMAND):
+        args = (n * QUERIES_PER_COMMAND + i, n)
+        if is_async:
+            await db.execute("INSERT OR IGNORE INTO prefixs (id, author) VALUES (?, ?)", args)
+            await db.fetch("SELECT * FROM prefixs WHERE author = ?", (n,))
+        else:
+            db.execute("INSERT OR IGNORE INTO prefixs (id, author) VALUES (?, ?)", args)
+            db.fetch("SELECT * FROM prefixs WHERE author = ?", (n,))
+            await asyncio.sleep(0)
+
+
+async def run(is_async):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    setup = sqlite.connect(path)
+    setup.execute("CREATE TABLE prefixs (id INT PRIMARY KEY, author INT)")
+    setup.close()
+
+    db = sqlite.AsyncDatabase(path) if is_async else sqlite.Database(path)
+    lags, stop = [], asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(command(db, n, is_async) for n in range(COMMANDS)))
+    took = time.perf_counter() - start
+
+    stop.set()
+    await probe_task
+    if is_async:
+        await db.close()
+    return took, lags
+
+
+def report(name, took, lags):
+    lags = sorted(lags)
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+    print(f"{name:<9} wall {took * 1000:8.1f} ms | loop lag mean {statistics.mean(lags):7.2f} ms"
+          f" | p99 {p99:7.2f} ms | max {lags[-1]:7.2f} ms | samples {len(lags)}")
+
+
+if __name__ == "__main__":
+    print(f"{COMMANDS} concurrent commands x {QUERIES_PER_COMMAND} (insert + select)")
+    report("Blocking", *asyncio.run(run(False)))
+    report("Async", *asyncio.run(run(True)))
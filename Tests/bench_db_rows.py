@@ -0,0 +1,76 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+Fetch speed and memory for 100k rows: the old dict_factory vs the generated row types vs raw tuples.
+
+run from the repo root: python -m Tests.bench_db_rows
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import sqlite  # noqa: E402
+
+ROWS = 100_000
+QUERIES = {
+    "SELECT id FROM users": "1 column",
+    "SELECT * FROM prefixs": "4 columns",
+}
+
+
+class prefixs(sqlite.Table):
+    id = sqlite.Column("INT", nullable=False, primary_key=True)
+    prefix = sqlite.Column("TEXT", nullable=False, default="~")
+    author = sqlite.Column("INT", nullable=False, default=845186772698923029)
+    timestamp = sqlite.Column("REAL", nullable=False, default=0)
+
+
+def setup():
+    db = sqlite.Database(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    db.execute("CREATE TABLE users (id INT PRIMARY KEY)")
+    db.execute(prefixs.create_table())
+    db.executemany("INSERT INTO users (id) VALUES (?)", ((i,) for i in range(ROWS)))
+    db.executemany("INSERT INTO prefixs (id, prefix, author, timestamp) VALUES (?, ?, ?, ?)",
+                   ((i, "~", i * 7, i / 3) for i in range(ROWS)))
+    return db
+
+
+def measure(fetch):
+    start = time.perf_counter()
+    fetch()
+    took = time.perf_counter() - start
+
+    tracemalloc.start()
+    data = fetch()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    return took, size
+
+
+if __name__ == "__main__":
+    db = setup()
+    for sql, shape in QUERIES.items():
+        print(f"{sql} ({shape}, {ROWS:,} rows)")
+
+        def dicts():
+            db.conn.row_factory = sqlite.dict_factory
+            try:
+                return db.conn.execute(sql).fetchall()
+            finally:
+                db.conn.row_factory = None
+
+        for name, fetch in (("dict", dicts),
+                            ("Row", lambda: db.fetch(sql)),
+                            ("raw", lambda: db.fetch(sql, raw=True))):
+            took, size = measure(fetch)
+            print(f"  {name:<5} {took * 1000:8.1f} ms  {size / 1024 ** 2:7.2f} MiB")
@@ -0,0 +1,60 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+Rows per second for autocommitted single statements vs the write-behind queue.
+
+run from the repo root: python -m Tests.bench_db_write_behind
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import sqlite  # noqa: E402
+
+ROWS = 5000
+SQL = "INSERT OR IGNORE INTO guilds (id) VALUES (?)"
+
+
+def fresh_db():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    setup = sqlite.connect(path)
+    setup.execute("CREATE TABLE guilds (id INT PRIMARY KEY)")
+    setup.close()
+    return sqlite.AsyncDatabase(path)
+
+
+async def single():
+    db = fresh_db()
+    start = time.perf_counter()
+    for i in range(ROWS):
+        await db.execute(SQL, (i,))
+    took = time.perf_counter() - start
+    await db.close()
+    return took
+
+
+async def batched():
+    db = fresh_db()
+    start = time.perf_counter()
+    for i in range(ROWS):
+        db.writes.put(SQL, (i,))
+        await asyncio.sleep(0)
+    await db.writes.close()
+    took = time.perf_counter() - start
+    await db.close()
+    return took
+
+
+if __name__ == "__main__":
+    for name, bench in (("single", single), ("batched", batched)):
+        took = asyncio.run(bench())
+        print(f"{name:<8} {ROWS} rows in {took:6.2f} s -> {ROWS / took:10,.0f} rows/s")
@@ -0,0 +1,120 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+Upstream calls and wall time for a burst of http.query-like traffic.
+
+A local aiohttp stub answers every request after a fixed delay and counts
+them. Old = the previous utils.cache.async_cache (copied below), New = the
+AsyncTTLCache based one. Traffic is waves of concurrent requests for a small
+set of hot URLs (the way a popular command gets spammed) with the headers
+dict built in a random order each time.
+
+run from the repo root: python -m Tests.bench_http_cache
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from functools import wraps
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import async_cache  # noqa: E402
+
+UPSTREAM_DELAY = 0.05
+WAVES = 20
+CONCURRENT = 50
+HOT_URLS = 10
+PAYLOAD = b"x" * 4096
+
+
+def old_async_cache(maxsize=128):
+    cache = {}
+
+    def decorator(func):
+        @wraps(func)
+        async def inner(*args, no_cache=False, **kwargs):
+            if no_cache:
+                return await func(*args, **kwargs)
+
+            key_base = "_".join(str(x) for x in args)
+            key_end = "_".join(f"{k}:{v}" for k, v in kwargs.items())
+            key = f"{key_base}-{key_end}"
+
+            if key in cache:
+                return cache[key]
+
+            res = await func(*args, **kwargs)
+
+            if len(cache) > maxsize:
+                del cache[list(cache.keys())[0]]
+                cache[key] = res
+
+            return res
+        return inner
+    return decorator
+
+
+async def stub_server(port):
+    counter = {"requests": 0}
+
+    async def handler(request):
+        counter["requests"] += 1
+        await asyncio.sleep(UPSTREAM_DELAY)
+        return web.Response(body=PAYLOAD)
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner, counter
+
+
+def headers():
+    items = [("User-Agent", "edoC"), ("Accept", "application/json"), ("X-Api-Key", "abc")]
+    random.shuffle(items)
+    return dict(items)
+
+
+async def run(name, decorate, port):
+    runner, counter = await stub_server(port)
+    async with aiohttp.ClientSession() as session:
+        @decorate
+        async def query(url, method="get", res_method="text", *args, **kwargs):
+            async with getattr(session, method.lower())(url, *args, **kwargs) as res:
+                return await getattr(res, res_method)()
+
+        random.seed(0)
+        start = time.perf_counter()
+        for _ in range(WAVES):
+            await asyncio.gather(*(
+                query(f"http://127.0.0.1:{port}/item/{random.randrange(HOT_URLS)}", headers=headers())
+                for _ in range(CONCURRENT)
+            ))
+        took = time.perf_counter() - start
+    await runner.cleanup()
+    total = WAVES * CONCURRENT
+    print(f"{name:<4} {total:>8} {counter['requests']:>9} {took:8.2f}s {total / took:10.0f}")
+    return query
+
+
+async def main():
+    print(f"{WAVES} waves x {CONCURRENT} concurrent requests over {HOT_URLS} urls, upstream takes {UPSTREAM_DELAY * 1000:g}ms")
+    print(f"{'':<4} {'requests':>8} {'upstream':>9} {'wall':>9} {'req/s':>10}")
+    await run("old", old_async_cache(), 9481)
+    new = await run("new", async_cache(maxsize=None, ttl=300), 9482)
+    print(new.cache.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
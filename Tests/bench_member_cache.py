@@ -0,0 +1,106 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+RSS per 10k members under each utils.membercache policy.
+
+Synthetic GUILD_CREATE payloads (members, presences with an activity, a few
+voice states) are fed to discord.Guild the same way the gateway does. Each
+policy runs in its own process so freed memory from one can't hide in the
+next. For lru every guild is swept right after it's created, like the
+scheduled sweep would.
+
+run from the repo root: python -m Tests.bench_member_cache
+"""
+import gc
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import discord
+import psutil
+from discord.state import ConnectionState
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.membercache import POLICIES, MemberCachePolicy  # noqa: E402
+
+GUILDS = 20
+MEMBERS_PER_GUILD = 5000
+PER_GUILD_CAP = 1000
+INTENTS = discord.Intents(guilds=True, members=True, presences=True, voice_states=True, messages=True)
+
+
+def make_state(policy):
+    state = ConnectionState(dispatch=lambda *args, **kwargs: None, handlers={}, hooks={}, http=SimpleNamespace(),
+                            intents=INTENTS, member_cache_flags=policy.cache_flags(INTENTS))
+    state.user = discord.ClientUser(state=state, data={"id": "1", "username": "edoC", "discriminator": "0",
+                                                       "avatar": None, "global_name": None})
+    return state
+
+
+def payload(guild_id):
+    base = guild_id * 1_000_000
+    members, presences = [], []
+    for i in range(MEMBERS_PER_GUILD):
+        user_id = str(base + i)
+        members.append({
+            "user": {"id": user_id, "username": f"member{i}", "discriminator": f"{i % 10000:04}",
+                     "avatar": "a" * 32, "global_name": f"Member {i}"},
+            "roles": [], "nick": None, "joined_at": "2021-01-01T00:00:00+00:00", "deaf": False, "mute": False,
+            "flags": 0,
+        })
+        if i % 3 == 0:
+            presences.append({"user": {"id": user_id}, "status": "online", "client_status": {"desktop": "online"},
+                              "activities": [{"name": "Minecraft", "type": 0, "created_at": 0}]})
+    channel = str(base + 999_999)
+    return {
+        "id": str(guild_id), "name": f"guild {guild_id}", "owner_id": str(base), "member_count": MEMBERS_PER_GUILD,
+        "roles": [], "emojis": [], "features": [],
+        "channels": [{"id": channel, "type": 2, "name": "voice", "position": 0, "permission_overwrites": [],
+                      "bitrate": 64000, "user_limit": 0}],
+        "members": members, "presences": presences,
+        "voice_states": [{"user_id": str(base + i), "channel_id": channel, "session_id": "x", "deaf": False,
+                          "mute": False, "self_deaf": False, "self_mute": False, "suppress": False}
+                         for i in range(0, MEMBERS_PER_GUILD, 500)],
+    }
+
+
+def run(name):
+    policy = MemberCachePolicy(name, per_guild=PER_GUILD_CAP, keep_seconds=0)
+    state = make_state(policy)
+    process = psutil.Process()
+    gc.collect()
+    before = process.memory_info().rss
+    guilds = []
+    for guild_id in range(1, GUILDS + 1):
+        data = payload(guild_id)
+        guild = discord.Guild(data=data, state=state)
+        del data
+        policy.sweep([guild])
+        guilds.append(guild)
+    gc.collect()
+    grew = process.memory_info().rss - before
+    cached = sum(len(guild._members) for guild in guilds)
+    print(f"{name},{cached},{grew}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run(sys.argv[1])
+        sys.exit()
+
+    total = GUILDS * MEMBERS_PER_GUILD
+    print(f"{GUILDS} guilds x {MEMBERS_PER_GUILD} members (cap {PER_GUILD_CAP}/guild for lru)")
+    print(f"{'policy':<7} {'cached':>8} {'RSS':>10} {'RSS / 10k members in guilds':>28}")
+    for name in POLICIES:
+        out = subprocess.run([sys.executable, "-m", "Tests.bench_member_cache", name],
+                             capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+        _, cached, grew = out.split(",")
+        grew = int(grew)
+        print(f"{name:<7} {int(cached):>8,} {grew / 1024 ** 2:8.1f} MiB {grew / (total / 10_000) / 1024 ** 2:24.2f} MiB")
@@ -0,0 +1,181 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+Messages per second through edoC.on_message.
+
+old = the previous on_message (copied below): get_guild_permissions' ten
+      guild_permissions reads into a dict, then process_commands, which
+      builds the context a second time
+new = utils.default.edoC.on_message with the PermissionCache gate and a
+      single get_context, called on a stub bot
+
+get_context and invoke are stubs that hand back a prebuilt context and do
+nothing, so both sides pay the same for them and what's left is the
+handler itself plus the gate. The bot member is faked but guild_permissions
+is worked out the same way discord.py does it (OR of every role, then the
+admin override). The gate on its own is timed too.
+
+needs a config.json like the bot does, utils.default reads it on import.
+run from the repo root: python -m Tests.bench_on_message_gate
+"""
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import discord
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.default import can_handle, edoC  # noqa: E402
+from utils.membercache import MemberCachePolicy  # noqa: E402
+from utils.metrics import Registry  # noqa: E402
+from utils.perms import PermissionCache  # noqa: E402
+from utils.watchdog import LoopWatchdog  # noqa: E402
+
+MESSAGES = 100_000
+GUILDS = 50
+
+
+class FakeMe:
+    def __init__(self, roles):
+        self.roles = roles
+
+    @property
+    def guild_permissions(self):
+        base = discord.Permissions.none()
+        for role in self.roles:
+            base.value |= role.permissions.value
+        if base.administrator:
+            return discord.Permissions.all()
+        return base
+
+
+class FakeChannel:
+    def __init__(self, guild):
+        self.guild = guild
+
+    def permissions_for(self, member):
+        return member.guild_permissions
+
+
+class StubBot:
+    """ What on_message touches on the bot, get_context and invoke don't do any work """
+
+    def __init__(self, contexts):
+        self.contexts = contexts
+        self.seen_messages = 0
+        self.messages_seen_metric = Registry().counter("bench_messages_seen_total", "bench")
+        self.member_cache = MemberCachePolicy()
+        self.guild_perms = PermissionCache()
+        self.watchdog = LoopWatchdog()
+        self.invoked = 0
+
+    def is_ready(self):
+        return True
+
+    async def get_context(self, msg, cls=None):
+        return self.contexts[msg.id]
+
+    async def invoke(self, ctx):
+        self.invoked += 1
+
+    async def process_commands(self, msg):
+        # what commands.Bot.process_commands does: build the context again, then invoke it
+        ctx = await self.get_context(msg)
+        await self.invoke(ctx)
+
+    async def send_missing_perms(self, ctx):
+        pass
+
+
+def old_gate(ctx, return_dict=False):
+    all_perms = {}
+    admin = ctx.guild.me.guild_permissions.administrator  # noqa: F841
+    all_perms['Add Reactions'] = ctx.guild.me.guild_permissions.add_reactions
+    all_perms['View Audit Log'] = ctx.guild.me.guild_permissions.view_audit_log
+    all_perms['Read Messages'] = ctx.guild.me.guild_permissions.read_messages
+    all_perms['Send Messages'] = ctx.guild.me.guild_permissions.send_messages
+    all_perms['Embed Links'] = ctx.guild.me.guild_permissions.embed_links
+    all_perms['Attach Files'] = ctx.guild.me.guild_permissions.attach_files
+    all_perms['read Message History'] = ctx.guild.me.guild_permissions.read_message_history
+    all_perms['External Emojis'] = ctx.guild.me.guild_permissions.external_emojis
+    all_perms['Connect'] = ctx.guild.me.guild_permissions.connect
+    all_perms['Speak'] = ctx.guild.me.guild_permissions.speak
+    if return_dict:
+        return all_perms
+    if all(all_perms.values()):
+        return True
+    return False
+
+
+async def old_on_message(self, msg):
+    if not self.is_ready() or msg.author.bot or not can_handle(msg, "send_messages"):
+        return
+    self.seen_messages += 1
+    if bool(msg.raw_mentions):
+        if msg.raw_mentions[0] == 845186772698923029 and len(msg.content) == 22:
+            context = await self.get_context(msg)
+            await context.send_help()
+    ctx = await self.get_context(msg)
+    is_command = ctx.valid
+    if is_command:
+        check = old_gate(ctx)
+        if not check:
+            return await self.send_missing_perms(ctx)
+        await self.process_commands(msg)
+
+
+def make_messages():
+    roles = [SimpleNamespace(permissions=discord.Permissions(1 << i)) for i in range(8)]
+    roles.append(SimpleNamespace(permissions=discord.Permissions.general() | discord.Permissions.text()
+                                 | discord.Permissions.voice()))
+    guilds = [SimpleNamespace(id=i, me=FakeMe(roles)) for i in range(GUILDS)]
+    author = SimpleNamespace(id=1, bot=False)
+    messages, contexts = [], []
+    for i in range(MESSAGES):
+        guild = guilds[i % GUILDS]
+        msg = SimpleNamespace(id=i, author=author, guild=guild, channel=FakeChannel(guild), raw_mentions=[],
+                              content="~ping")
+        messages.append(msg)
+        contexts.append(SimpleNamespace(valid=True, guild=guild, author=author, message=msg,
+                                        command=SimpleNamespace(qualified_name="ping")))
+    return messages, contexts
+
+
+async def run(name, handler, messages, contexts):
+    bot = StubBot(contexts)
+    start = time.perf_counter()
+    for msg in messages:
+        await handler(bot, msg)
+    took = time.perf_counter() - start
+    print(f"{name:<12} {MESSAGES / took:14,.0f} msg/s  ({bot.invoked:,} invoked)")
+
+
+def run_gate(name, gate, contexts):
+    start = time.perf_counter()
+    passed = sum(1 for ctx in contexts if gate(ctx))
+    took = time.perf_counter() - start
+    print(f"{name:<12} {MESSAGES / took:14,.0f} msg/s  ({passed:,} passed)")
+
+
+async def main():
+    messages, contexts = make_messages()
+    print(f"{MESSAGES:,} command messages over {GUILDS} guilds, 9 roles on the bot")
+    print("on_message")
+    await run("  old", old_on_message, messages, contexts)
+    await run("  new", edoC.on_message, messages, contexts)
+    print("gate only")
+    cache = PermissionCache()
+    run_gate("  old", old_gate, contexts)
+    run_gate("  cached", lambda ctx: cache.has_required(ctx.guild), contexts)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+utils.migrations against old databases whose rows don't fit the declared schema.
+
+run from the repo root: python -m pytest Tests/test_migrations.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import migrations, sqlite  # noqa: E402
+from utils.config import todo, users  # noqa: E402
+
+# the todo table from data/db/build.sql, no keys and nothing NOT NULL
+LEGACY_TODO = 'CREATE TABLE todo ("todo" TEXT, "id" NUMERIC, "time" NUMERIC, "message_url" TEXT, "user_id" NUMERIC)'
+
+
+def tables(conn):
+    return {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_rows_that_dont_fit_keep_the_old_table(tmp_path):
+    db = sqlite.Database(str(tmp_path / "edoC.db"))
+    db.conn.execute(LEGACY_TODO)
+    db.conn.executemany("INSERT INTO todo VALUES (?, ?, ?, ?, ?)", [
+        ("fine", 1, 10.0, None, 7),
+        ("same id", 1, 11.0, None, 7),
+        ("no id", None, 12.0, None, 7),
+        ("no user", 2, 13.0, None, None),
+        ("also fine", 3, 14.0, "https://discord.com", 8),
+    ])
+
+    steps = migrations.migrate(db, [todo])
+
+    assert steps
+    rows = db.conn.execute("SELECT id, todo FROM todo ORDER BY id").fetchall()
+    assert [tuple(row) for row in rows] == [(1, "fine"), (3, "also fine")]
+    assert "todo_legacy_v1" in tables(db.conn)
+    assert db.conn.execute("SELECT COUNT(*) FROM todo_legacy_v1").fetchone()[0] == 5
+    indexes = db.conn.execute("SELECT tbl_name FROM sqlite_master WHERE name = 'todo_user_id_idx'").fetchall()
+    assert [tuple(row) for row in indexes] == [("todo",)]
+    assert migrations.migrate(db, [todo]) == []
+
+
+def test_null_in_a_defaulted_column_gets_the_default(tmp_path):
+    db = sqlite.Database(str(tmp_path / "edoC.db"))
+    db.conn.execute("CREATE TABLE users ('id' INT NOT NULL, 'premium' BOOL, 'banned' BOOL, PRIMARY KEY (id))")
+    db.conn.executemany("INSERT INTO users VALUES (?, ?, ?)", [(5, None, None), (6, True, None)])
+
+    migrations.migrate(db, [users])
+
+    rows = db.conn.execute("SELECT id, premium, banned FROM users ORDER BY id").fetchall()
+    assert [tuple(row) for row in rows] == [(5, 0, 0), (6, 1, 0)]
+    assert "users_legacy_v1" not in tables(db.conn)
+    db.conn.execute("INSERT INTO users (id) VALUES (7)")
@@ -0,0 +1,195 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+Runs edoC as several processes, each one owning a slice of the shards.
+
+    python cluster.py            # clusters/shards from the "cluster" section of config.json
+    python cluster.py 4          # 4 clusters
+
+Every cluster is a normal index.py with its shard range in the environment
+(see utils/cluster.py). Exit codes follow docs/notes/notes.md: 600 from any
+cluster shuts the whole bot down and the launcher exits with 600 too so pm2
+leaves it alone, 601 restarts just that cluster, anything else is a crash and
+gets restarted with a backoff. The launcher also sums every cluster's guild
+and member counts and sends the totals back, for the presence and stats.
+"""
+import asyncio
+import json
+import os
+import secrets
+import signal
+import sys
+import time
+
+import aiohttp
+
+from utils.cluster import SHUTDOWN, ClusterInfo, exit_kind, send
+
+GATEWAY = "https://discord.com/api/v9/gateway/bot"
+
+
+def config(filename: str = "config"):
+    with open(f"{filename}.json", encoding='utf8') as data:
+        return json.load(data)
+
+
+async def recommended_shards(token: str) -> int:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY, headers={"Authorization": f"Bot {token}"}) as res:
+            res.raise_for_status()
+            return (await res.json())["shards"]
+
+
+def split(shard_count: int, clusters: int):
+    """ Contiguous shard ranges, the first clusters get one more when it doesn't divide evenly """
+    size, extra = divmod(shard_count, clusters)
+    ranges, start = [], 0
+    for cluster in range(clusters):
+        end = start + size + (cluster < extra)
+        ranges.append(list(range(start, end)))
+        start = end
+    return [shards for shards in ranges if shards]
+
+
+class Cluster:
+    def __init__(self, info: ClusterInfo):
+        self.info = info
+        self.process = None
+        self.started = 0.0
+        self.backoff = 1.0
+        self.stats = {"guilds": 0, "members": 0}
+
+    @property
+    def name(self):
+        return f"cluster {self.info.cluster_id} (shards {self.info.shard_ids[0]}-{self.info.shard_ids[-1]})"
+
+
+class Launcher:
+    def __init__(self, clusters: int, shard_count: int, *, host: str = "127.0.0.1", port: int = 9200,
+                 max_backoff: float = 60):
+        self.host = host
+        self.port = port
+        self.secret = secrets.token_hex(16)
+        self.max_backoff = max_backoff
+        self.clusters = [
+            Cluster(ClusterInfo(cluster_id, shard_ids, shard_count, f"{host}:{port}", self.secret))
+            for cluster_id, shard_ids in enumerate(split(shard_count, clusters))
+        ]
+        self.writers = {}
+        self.exit_code = 0
+        self._stopping = False
+
+    # ipc
+
+    def totals(self):
+        return {
+            "op": "totals",
+            "guilds": sum(cluster.stats["guilds"] for cluster in self.clusters),
+            "members": sum(cluster.stats["members"] for cluster in self.clusters),
+            "clusters": len(self.clusters),
+        }
+
+    async def broadcast(self):
+        totals = self.totals()
+        for writer in list(self.writers.values()):
+            try:
+                await send(writer, **totals)
+            except OSError:
+                pass
+
+    async def handle(self, reader, writer):
+        cluster = None
+        try:
+            hello = json.loads(await reader.readline() or b"{}")
+            if hello.get("op") != "hello" or not secrets.compare_digest(str(hello.get("secret")), self.secret):
+                return
+            cluster = self.clusters[int(hello["cluster"])]
+            self.writers[cluster.info.cluster_id] = writer
+            await send(writer, **self.totals())
+            while line := await reader.readline():
+                message = json.loads(line)
+                if message.get("op") == "stats":
+                    cluster.stats = {"guilds": int(message["guilds"]), "members": int(message["members"])}
+                    await self.broadcast()
+        except (OSError, ValueError, KeyError, IndexError) as e:
+            print(f"[cluster] ipc error from {cluster.name if cluster else 'unknown'}: {e}")
+        finally:
+            if cluster is not None and self.writers.get(cluster.info.cluster_id) is writer:
+                del self.writers[cluster.info.cluster_id]
+            writer.close()
+
+    # processes
+
+    async def spawn(self, cluster: Cluster):
+        env = {**os.environ, **cluster.info.env()}
+        cluster.process = await asyncio.create_subprocess_exec(sys.executable, "-u", "index.py", env=env)
+        cluster.started = time.monotonic()
+        print(f"[cluster] started {cluster.name} as pid {cluster.process.pid}")
+
+    async def supervise(self, cluster: Cluster):
+        while not self._stopping:
+            await self.spawn(cluster)
+            code = await cluster.process.wait()
+            cluster.stats = {"guilds": 0, "members": 0}
+            if self._stopping:
+                return
+            kind = exit_kind(code)
+            if kind == "shutdown":
+                print(f"[cluster] {cluster.name} asked for a shutdown, stopping every cluster")
+                self.exit_code = SHUTDOWN
+                return await self.stop()
+            if kind == "restart":
+                print(f"[cluster] {cluster.name} is restarting")
+                cluster.backoff = 1.0
+                continue
+            if code == 0:
+                print(f"[cluster] {cluster.name} exited cleanly, not restarting it")
+                return
+            # a cluster that stayed up for a while gets a fresh backoff
+            if time.monotonic() - cluster.started > self.max_backoff:
+                cluster.backoff = 1.0
+            print(f"[cluster] {cluster.name} crashed with exit code {code}, restarting in {cluster.backoff:g}s")
+            await asyncio.sleep(cluster.backoff)
+            cluster.backoff = min(cluster.backoff * 2, self.max_backoff)
+
+    async def stop(self):
+        self._stopping = True
+        for cluster in self.clusters:
+            if cluster.process is not None and cluster.process.returncode is None:
+                cluster.process.terminate()
+
+    async def run(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, lambda: loop.create_task(self.stop()))
+            except (NotImplementedError, RuntimeError):
+                # windows, ctrl+c still ends up as KeyboardInterrupt
+                pass
+        print(f"[cluster] {len(self.clusters)} clusters over {self.clusters[0].info.shard_count} shards")
+        try:
+            async with server:
+                await asyncio.gather(*(self.supervise(cluster) for cluster in self.clusters))
+        finally:
+            await self.stop()
+        return self.exit_code
+
+
+async def main(argv):
+    settings = config()
+    section = settings.get("cluster", {})
+    clusters = int(argv[1]) if len(argv) > 1 else section.get("clusters", 2)
+    shard_count = section.get("shards") or await recommended_shards(settings["token"])
+    launcher = Launcher(max(1, min(clusters, shard_count)), shard_count,
+                        host=section.get("ipc_host", "127.0.0.1"), port=section.get("ipc_port", 9200))
+    return await launcher.run()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv)))
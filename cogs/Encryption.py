@@ -25,7 +25,7 @@ class Encryption(commands.Cog, description='Need to send a super secret encrypte
         self.PADDING = 5
         self.bot = bot
         self.config = bot.config
-        self.sra = SRA(session=self.bot.session)
+        self.sra = SRA()
 
     @commands.group(aliases=['e'])
     async def encode(self, ctx):
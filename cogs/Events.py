@@ -16,13 +16,14 @@ from discord.ext import commands, tasks
 from discord.ext.commands import MissingPermissions, CheckFailure, MaxConcurrencyReached, CommandOnCooldown
 from psutil import Process
 
-from cogs.Music import music_
 # from lib.db import db
 from utils import default
 from utils.checks import GuildNotFound
+from utils.config import guilds
+from utils.httppolicy import UpstreamUnavailable
 from utils.vars import *
 
-getLogger("events")
+log = getLogger("events")
 owners = default.config()["owners"]
 bla = {}
 default.MakeBlackList(bla)
@@ -92,8 +93,10 @@ class Events(commands.Cog, description='Event handling if u can see this ping th
             chan for chan in sorted(guild.channels, key=lambda x: x.position)
             if chan.permissions_for(guild.me).send_messages and isinstance(chan, discord.TextChannel)
         ), None)
-        self.db.execute("INSERT OR IGNORE INTO guilds (id) VALUES (?)",
-                        (guild.id,))
+        # a rejoin is a conflict on the key and does nothing, any other failure gets logged
+        result = await guilds.upsert(self.db, id=guild.id)
+        if not result.startswith("INSERT"):
+            log.error("couldn't add guild %s to the db: %s", guild.id, result)
         channel = self.bot.get_channel(guild.system_channel) or to_send
         await channel.send("Thank you for inviting me to the server")
         await channel.send("Please do ~help to get started")
@@ -160,6 +163,8 @@ class Events(commands.Cog, description='Event handling if u can see this ping th
         elif isinstance(err, commands.TooManyArguments):
             await self.erroremb(ctx,
                                 description=f'You called the {ctx.command.qualified_name} command with too many arguments.')
+        elif isinstance(err, commands.CommandInvokeError) and isinstance(err.original, UpstreamUnavailable):
+            await self.erroremb(ctx, description=str(err.original))
         elif isinstance(err, commands.CommandInvokeError):
             error = default.traceback_maker(err.original)
             if "2000 or fewer" in str(err) and len(ctx.message.clean_content) > 1900:
@@ -215,7 +220,7 @@ class Events(commands.Cog, description='Event handling if u can see this ping th
             print(guild)
             return
         else:
-            self.db.execute("DELETE FROM guilds WHERE id=?", (guild.id,))
+            await self.db.execute("DELETE FROM guilds WHERE id=?", (guild.id,))
 
     @commands.Cog.listener()
     async def on_guild_remove(self, guild):
@@ -350,7 +355,10 @@ class Events(commands.Cog, description='Event handling if u can see this ping th
                 return
 
             elif after.channel is None:
-                player = music_.get_player(guild_id=before.channel.guild.id)
+                # Music is a deferred cog, importing it at the top would load it with the eager ones.
+                # Until it's loaded there are no players to stop
+                music = self.bot.extensions.get('cogs.Music')
+                player = music.music_.get_player(guild_id=before.channel.guild.id) if music else None
                 if player:
                     try:
                         await player.stop()
@@ -43,7 +43,7 @@ class Fun(commands.Cog, description='Fun and entertaining commands can be found
         self.config = config()
         self.alex_api_token = self.config["alexflipnote_api"]
         self.trivia = TriviaClient()
-        self.sra = SRA(session=self.bot.session)
+        self.sra = SRA()
 
     @command()
     async def trivia(self, ctx, difficulty: str):
@@ -865,12 +865,13 @@ class Fun(commands.Cog, description='Fun and entertaining commands can be found
         """
         Searches a term on urban dictionary and sends the result.
         """
-        res = await ctx.session.get('http://api.urbandictionary.com/v0/define', params={'term': term})
+        res = await self.bot.http_cache.fetch(self.bot.http_clients.get('urbandictionary'), 'v0/define',
+                                              params={'term': term}, ttl=86400)
         if not res.ok:
             await ctx.send(f'An error occured at the API. Try again with a different word or wait a bit.')
             return
 
-        data = await res.json()
+        data = res.json()
         if not data['list']:
             await ctx.send(f'No results were found for term `{term}`. Try again with a different word.')
             return
@@ -62,11 +62,11 @@ class Image(Cog, description='Image Related commands are here'):
         availible_endpoints = ['panda', 'dog', 'cat', 'fox', 'red_panda', 'koala',
                                'birb', 'raccoon', 'kangaroo', 'whale']
         self.check_endpoint(availible_endpoints, endpoint, 'animal')
-        async with ctx.session.get(f"https://some-random-api.ml/animal/{endpoint}") as r:
-            if r.status != 429:
-                content = await r.json()
-            else:
-                return await ctx.error('Too many requests, please try again later.')
+        # 429s are retried (and the host paused) by the sra client's policy, see utils/httppolicy.py
+        async with self.bot.http_clients.get('sra').get(f"animal/{endpoint}") as r:
+            if r.status != 200:
+                return await ctx.error(f'Recieved a bad status code of {r.status}, please try again later.')
+            content = await r.json()
         e = Embed(color=invis)
         e.set_footer(text=content['fact'])
         e.set_image(url=content['image'])
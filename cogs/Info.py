@@ -90,13 +90,15 @@ class Info(Cog, description='Informational and useful commands'):
         self.db = self.bot.db
 
     async def get_word(self, ctx, word: UrlSafe):
-        async with ctx.session.get(f"https://some-random-api.ml/dictionary?word={word}") as ses:
-            if ses.status != 200:
-                if ses.status == 404:
-                    return await ctx.error('Word Not found.')
-                elif ses.status == 429:
-                    return await ctx.error(f'Too many requests, please try again later.')
-        return await ses.json()
+        # definitions barely change, a week on disk saves most of the lookups
+        ses = await self.bot.http_cache.fetch(self.bot.http_clients.get('sra'), 'dictionary', params={'word': word},
+                                              ttl=7 * 86400)
+        if ses.status != 200:
+            if ses.status == 404:
+                return await ctx.error('Word Not found.')
+            elif ses.status == 429:
+                return await ctx.error(f'Too many requests, please try again later.')
+        return ses.json()
 
     @command(aliases=['McUser', 'MCI'], brief='Gets info about a minecraft user')
     async def mcinfo(self, ctx, user: str):
@@ -341,8 +343,7 @@ class Info(Cog, description='Informational and useful commands'):
         hexhex = str(hex(random_number))
         hex_number = hexhex[2:]
 
-        async with self.bot.session.get(self.colorApi + hex_number) as api:
-            data = await api.json()
+        data = (await self.bot.http_cache.fetch(self.bot.session, self.colorApi + hex_number, ttl=30 * 86400)).json()
         embed = discord.Embed(color=int(hexhex, 0))
         embed.add_field(name='Name', value=data['name'], inline=False)
         embed.add_field(name='Hex Code', value=data['hex'], inline=False)
@@ -366,8 +367,7 @@ class Info(Cog, description='Informational and useful commands'):
         ```
         """
         strcolor = str(colorname).replace('#', "")
-        async with self.bot.session.get(self.colorApi + strcolor) as api:
-            data = await api.json()
+        data = (await self.bot.http_cache.fetch(self.bot.session, self.colorApi + strcolor, ttl=30 * 86400)).json()
         co = f'0x{strcolor}'
         embed = discord.Embed(color=int(co, 0))
         embed.add_field(name='Name', value=data['name'], inline=False)
@@ -431,9 +431,9 @@ class Info(Cog, description='Informational and useful commands'):
     #     return await ctx.reply(embed=embeds[0], view=Paginator(ctx=ctx, embeds=embeds))
     async def get_all_todo(self, identifier: int = None):
         if not identifier:
-            return self.db.fetch("SELECT * FROM todo")
+            return await self.db.fetch("SELECT * FROM todo")
         else:
-            return self.db.fetch("SELECT * FROM todo WHERE user_id = ?", (identifier,))
+            return await self.db.fetch("SELECT * FROM todo WHERE user_id = ?", (identifier,))
 
     @commands.group(invoke_without_command=True)
     async def todo(self, ctx):
@@ -548,34 +548,21 @@ class Info(Cog, description='Informational and useful commands'):
     # ~~~~~~~~~~~~~~~~~~~~~~~~
     @command()
     # @cooldown(rate=1, per=300, type=BucketType.guild)
-    async def CmdStats(self, ctx):
-        try:
-            cmdsran = self.bot.commands_ran
-            marklist = sorted(cmdsran.items(), key=lambda x: x[1], reverse=True)
-            sortdict = dict(marklist)
-            p = ctx.prefix
-            value_iterator = iter(sortdict.values())
-            key_iterator = iter(sortdict.keys())
-            emby = discord.Embed(title='edoC command Stats',
-                                 description=f'{self.bot.total_commands_ran} Commands ran this boot\n',
-                                 color=random_color())
-            emby.add_field(name='Top 10 commands ran',
-                           value=f'🥇:{p}{next(key_iterator)} ({next(value_iterator)} uses)\n'
-                                 f'🥈:{p}{next(key_iterator)} ({next(value_iterator)} uses)\n'
-                                 f'🥉:{p}{next(key_iterator)} ({next(value_iterator)} uses)\n'
-                                 f'🏅:{p}{next(key_iterator)} ({next(value_iterator)} uses)\n'
-                                 f'🏅:{p}{next(key_iterator)} ({next(value_iterator)} uses)\n'
-                                 f'🏅:{p}{next(key_iterator)} ({next(value_iterator)} uses)\n'
-                                 f'🏅:{p}{next(key_iterator)} ({next(value_iterator)} uses)\n'
-                                 f'🏅:{p}{next(key_iterator)} ({next(value_iterator)} uses)\n'
-                                 f'🏅:{p}{next(key_iterator)} ({next(value_iterator)} uses)\n'
-                                 f'🏅:{p}{next(key_iterator)} ({next(value_iterator)} uses)\n')
-
-            emby.set_author(name=ctx.author.name, icon_url=ctx.author.display_avatar.url)
-
-            await ctx.reply('hi', embed=emby)
-        except StopIteration as e:
-            await ctx.send(f'{e} e')
+    async def CmdStats(self, ctx, days: int = 7):
+        server = ctx.guild.id if ctx.guild else 0
+        top = await self.bot.command_log.top(self.db, server, days=days)
+        p = ctx.prefix
+        medals = ['🥇', '🥈', '🥉']
+        emby = discord.Embed(title='edoC command Stats',
+                             description=f'{self.bot.total_commands_ran} Commands ran this boot\n',
+                             color=random_color())
+        emby.add_field(name=f'Top {len(top)} commands ran here in the last {days} days',
+                       value='\n'.join(f'{medals[i] if i < 3 else "🏅"}:{p}{name} ({uses} uses)'
+                                       for i, (name, uses) in enumerate(top)) or 'No commands ran yet')
+
+        emby.set_author(name=ctx.author.name, icon_url=ctx.author.display_avatar.url)
+
+        await ctx.reply(embed=emby)
 
     @command(hidden=True)
     @cooldown(rate=2, per=300, type=BucketType.user)
@@ -766,7 +753,7 @@ Comments: {comments}"""
         typing_ping = (end - start) * 1000
 
         start = time.perf_counter()
-        self.db.execute('SELECT 1')
+        await self.db.execute('SELECT 1')
         end = time.perf_counter()
         sql_ping = (end - start) * 1000
         e = discord.Embed(
@@ -899,8 +886,7 @@ Comments: {comments}"""
         info["Python Version"] = f"{platform.python_version()}"
         info["Avg users/server"] = f"{avgmembers:,.2f}"
         info["Bot owners"] = len(self.config["owners"])
-        info["Prefix in this server"] = await self.bot.get_prefix(
-            ctx.message)  # self.db.fetch('SELECT prefix FROM prefixs WHERE id = ?', ctx.guild.id)
+        info["Prefix in this server"] = ', '.join(self.bot.prefixes.get(ctx.guild.id if ctx.guild else None))
         info["Total members"] = totalmembers
         info["Ram usage"] = f"{ramUsage:.2f} MB"
         info["Developer"] = "Jake CEO of annoyance#1904"
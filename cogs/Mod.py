@@ -99,9 +99,9 @@ async def BannedU(ctx):
 
 async def BanUser(ctx, userid: MemberID, reason):
     BannedUsers + userid
-    ctx.bot.db.execute("INSERT INTO users (?, ?)", (userid, reason,))
+    await ctx.bot.db.execute("INSERT INTO users (?, ?)", (userid, reason,))
     # db.execute("INSERT INTO users (Reason)", reason)
-    ctx.bot.db.commit()
+    await ctx.bot.db.commit()
     return await ctx.send(f'{userid} Was banned from using the bot')
 
 
@@ -151,7 +151,7 @@ class Mod(commands.Cog, description='Moderator go brrrrrrrr ~ban'):
         return {'Bot': count}
 
     async def _complex_cleanup_strategy(self, ctx, search):
-        prefixes = tuple(self.bot.get_guild_prefixes(ctx.guild))  # thanks startswith todo update this bc it wont work rn
+        prefixes = self.bot.prefixes.matcher(ctx.guild.id)
 
         def check(m):
             return m.author == ctx.me or m.content.startswith(prefixes)
@@ -160,7 +160,7 @@ class Mod(commands.Cog, description='Moderator go brrrrrrrr ~ban'):
         return Counter(m.author.display_name for m in deleted)
 
     async def _regular_user_cleanup_strategy(self, ctx, search):
-        prefixes = tuple(self.bot.get_guild_prefixes(ctx.guild))
+        prefixes = self.bot.prefixes.matcher(ctx.guild.id)
 
         def check(m):
             return (m.author == ctx.me or m.content.startswith(prefixes)) and not (m.mentions or m.role_mentions)
@@ -603,6 +603,42 @@ class Mod(commands.Cog, description='Moderator go brrrrrrrr ~ban'):
         except Exception as e:
             await ctx.send(e)
 
+    @commands.group(invoke_without_command=True)
+    @commands.guild_only()
+    async def prefix(self, ctx):
+        """ Shows the prefixes for this server """
+        await ctx.invis(' '.join(f'`{p}`' for p in self.bot.prefixes.get(ctx.guild.id)))
+
+    @prefix.command(name='add')
+    @commands.has_permissions(manage_guild=True)
+    async def prefix_add(self, ctx, new_prefix: str):
+        """ Adds a prefix for this server """
+        if len(new_prefix) > 10:
+            return await ctx.error('Prefixes can be at most 10 characters long')
+        await self.bot.prefixes.add(self.bot.db, ctx.guild.id, new_prefix, ctx.author.id)
+        await ctx.success(f'Added `{new_prefix}`')
+
+    @prefix.command(name='remove', aliases=['rm', 'del'])
+    @commands.has_permissions(manage_guild=True)
+    async def prefix_remove(self, ctx, old_prefix: str):
+        """ Removes a prefix from this server """
+        current = self.bot.prefixes.get(ctx.guild.id)
+        if old_prefix not in current:
+            return await ctx.error(f'`{old_prefix}` isn\'t a prefix here')
+        if len(current) == 1:
+            # removing the last one would just bring the default back
+            return await ctx.error(f'`{old_prefix}` is the only prefix here, add another one first')
+        if not await self.bot.prefixes.remove(self.bot.db, ctx.guild.id, old_prefix):
+            return await ctx.error(f'`{old_prefix}` isn\'t a prefix here')
+        await ctx.success(f'Removed `{old_prefix}`')
+
+    @prefix.command(name='reset')
+    @commands.has_permissions(manage_guild=True)
+    async def prefix_reset(self, ctx):
+        """ Goes back to just the default prefix """
+        await self.bot.prefixes.reset(self.bot.db, ctx.guild.id)
+        await ctx.success(f'Reset the prefix to `{self.bot.prefix}`')
+
     @commands.group(invoke_without_command=True)
     @can_mute()
     async def mute(self, ctx, members: commands.Greedy[discord.Member], *, reason: ActionReason = None):
@@ -27,7 +27,7 @@ from jishaku.models import copy_context_with
 from jishaku.paginators import WrappedPaginator, PaginatorInterface
 
 from cogs.Mod import BanUser, MemberID
-from utils import default, http
+from utils import default, http, memory, profiler
 from utils.vars import *
 
 logger = logging.getLogger(__name__)
@@ -422,6 +422,84 @@ class Owner(commands.Cog, description='Only i can use these so shoo'):
             return await ctx.send(f"Module **{name_maker}** returned error and was not reloaded...\n{error}")
         await ctx.send(f"Reloaded module **{name_maker}**")
 
+    @commands.command(aliases=["looplag", "stalls"])
+    @commands.is_owner()
+    async def lag(self, ctx, reports: int = 3):
+        """ Event loop lag percentiles and the latest stalls with the code that caused them """
+        watchdog = self.bot.watchdog
+        summary = " | ".join(f"p{int(p * 100)} {watchdog.percentile(p) * 1000:.1f} ms" for p in (0.5, 0.95, 0.99))
+        recent = list(watchdog.reports)[-reports:] if reports > 0 else []
+        if not recent:
+            return await ctx.send(f"Loop lag over the last {len(watchdog.samples)} samples: {summary}\n"
+                                  f"No stalls over {watchdog.threshold * 1000:.0f} ms recorded")
+        body = "\n\n".join(
+            f"[{default.date(report.when, raw=True, seconds=True, clock=False)}] {report.format()}"
+            for report in reversed(recent)
+        )
+        await ctx.send(f"Loop lag over the last {len(watchdog.samples)} samples: {summary}\n"
+                       f"{len(watchdog.reports)} stalls recorded, newest first:",
+                       file=discord.File(BytesIO(body.encode("utf-8")), filename=default.timetext("stalls")))
+
+    @commands.command(aliases=["slowcmds", "cmdlatency"])
+    @commands.is_owner()
+    async def slowest(self, ctx, minutes: float = 15, limit: int = 10):
+        """ The slowest commands by p99 over the last few minutes, with the p99 of every phase """
+        rows = self.bot.command_timings.slowest(limit, window=minutes * 60)
+        if not rows:
+            return await ctx.send(f"No commands finished in the last {minutes:g} minutes")
+
+        def ms(seconds):
+            return f"{seconds * 1000:.0f}"
+
+        lines = [f"{'command':<20} {'n':>5} {'p50':>6} {'p95':>6} {'p99':>6} | p99 lookup/prepare/body/send (ms)"]
+        for name, count, summary in rows:
+            p50, p95, p99 = summary['total']
+            phases = "/".join(ms(summary[phase][2]) for phase in ('lookup', 'prepare', 'body', 'send'))
+            lines.append(f"{name[:20]:<20} {count:>5} {ms(p50):>6} {ms(p95):>6} {ms(p99):>6} | {phases}")
+        await ctx.send(default.wrap('prolog', '\n'.join(lines)))
+
+    @commands.command(aliases=["prof", "sample"])
+    @commands.is_owner()
+    @commands.max_concurrency(1)
+    async def profile(self, ctx, seconds: float = 10, top: int = 15):
+        """ Samples every thread for a while, sends collapsed stacks for flamegraphs and the hottest functions """
+        seconds = min(max(seconds, 1), 120)
+        msg = await ctx.send(f"Sampling every thread for {seconds:g}s...")
+        result = await asyncio.to_thread(profiler.Sampler().run, seconds)
+        lines = [f"{result.samples} samples over {result.duration:.1f}s (every {result.interval * 1000:g} ms)",
+                 f"{'self':>6} {'total':>6}  function"]
+        for frame, own, total in result.hottest(top):
+            lines.append(f"{own / result.samples:6.1%} {total / result.samples:6.1%}  {frame}")
+        data = BytesIO(result.collapsed().encode("utf-8"))
+        await msg.delete()
+        await ctx.send(default.wrap('prolog', '\n'.join(lines))[:2000],
+                       file=discord.File(data, filename=default.CustomTimetext('collapsed', 'profile')))
+
+    @commands.command(aliases=["memory", "leaks"])
+    @commands.is_owner()
+    async def memdiff(self, ctx, since: str = "previous", top: int = 15):
+        """
+        tracemalloc diff grouped by package, biggest growers first.
+        The first run starts tracing, `since` can be previous, baseline or stop.
+        """
+        tracker = self.bot.memory
+        if since == "stop":
+            tracker.stop()
+            return await ctx.send("Stopped tracing allocations")
+        if tracker.baseline is None:
+            await asyncio.to_thread(tracker.start)
+            return await ctx.send("Started tracing allocations, run this again later to see what grew")
+
+        last = tracker.taken
+        rows = await asyncio.to_thread(tracker.diff, "baseline" if since == "baseline" else "previous")
+        lines = [f"{'package':<24} {'grew':>11} {'blocks':>9} {'now':>11}"]
+        for package, size_diff, count_diff, size in rows[:top]:
+            lines.append(f"{package[:24]:<24} {memory.humanize_bytes(size_diff):>11} {count_diff:>+9} "
+                         f"{memory.humanize_bytes(size)[1:]:>11}")
+        await ctx.send(f"Since {default.date(last, ago=True)} | RSS {self.bot.process.memory_info().rss / 1024 ** 2:.0f} MiB"
+                       f" | tracemalloc overhead {memory.humanize_bytes(tracker.overhead())[1:]}\n"
+                       + default.wrap('prolog', '\n'.join(lines)))
+
     @commands.command()
     @commands.is_owner()
     async def shutdown(self, ctx):
@@ -18,7 +18,7 @@ class Profile(Cog, description='A cog that generates fake profile info'):
     def __init__(self, bot):
         self.bot = bot
         self.config = self.bot.config
-        self.sra = SRA(session=self.bot.session)
+        self.sra = SRA()
 
     def fake_profile(self):
         fake = Faker()
@@ -6,11 +6,11 @@
 #  file that should have been included as part of this package.                                    +
 # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 
-import aiohttp
 import discord
 from discord.ext import commands
 from discord.ext.commands.errors import CommandInvokeError
 
+from utils.apis.mojang.mojang import resolver
 from utils.vars import *
 
 SbColors = {
@@ -87,33 +87,36 @@ class Skyblock(commands.Cog, description='Skyblock cog for.. SKYBLOCK related co
 
     """ SKILLS """
 
+    async def _mojang_profile(self, name: str) -> tuple:
+        # batched with every other lookup in flight, see utils/apis/mojang/resolver.py
+        found = await resolver.resolve(name)
+        if found is None:
+            raise LookupError(f"{name} isn't a minecraft account")
+        return found
+
     async def get_name(self, name: str) -> str:
-        data = await self.bot.get_url(self.MojangUrl + name)
-        return data['name']
+        return (await self._mojang_profile(name))[0]
 
     async def get_uuid(self, name):
-        data = await self.bot.get_url(self.MojangUrl + name)
-        return data['id']
+        return (await self._mojang_profile(name))[1]
 
     async def edget_name(self, uuid):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'https://api.mojang.com/user/profiles/{uuid}/names') as r:
-                r.raise_for_status()
-                if r.status == 200:
-                    j = await r.json()
-                    return j[-1]['name']
-                else:
-                    return None
+        async with self.bot.http_clients.get('mojang').get(f'user/profiles/{uuid}/names') as r:
+            r.raise_for_status()
+            if r.status == 200:
+                j = await r.json()
+                return j[-1]['name']
+            else:
+                return None
 
     async def erget_uuid(self, ign):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"https://api.mojang.com/users/profiles/minecraft/{ign}") as r:
-                r.raise_for_status()
-                if r.status == 200:
-                    j = await r.json()
-                    return j['id']
-                elif r.status == 204:
-                    return None
+        async with self.bot.http_clients.get('mojang').get(f"users/profiles/minecraft/{ign}") as r:
+            r.raise_for_status()
+            if r.status == 200:
+                j = await r.json()
+                return j['id']
+            elif r.status == 204:
+                return None
 
     @commands.command(aliases=['coins', 'bal'])
     async def balance(self, ctx, name, pname=None):
@@ -21,9 +21,7 @@ class Weather(commands.Cog, description='Weather cmd'):
         self.config = bot.config
         self.process = psutil.Process(os.getpid())
         self.openweathermap_api_key = self.config["open_weather_map_api_key"]
-        self.openweather = OpenWeatherAPI(
-            key=self.openweathermap_api_key, session=self.bot.session
-        )
+        self.openweather = OpenWeatherAPI(key=self.openweathermap_api_key)
 
     @commands.command(
         aliases=("w",),
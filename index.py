@@ -10,11 +10,16 @@ import logging
 from logging.handlers import RotatingFileHandler
 from os import environ, listdir
 
-from utils.default import edoC, config
+from utils.startup import DEFERRED_COGS, Startup
+
+startup = Startup()
+with startup.step("import utils.default"):
+    from utils.default import edoC, config
 
 config = config()
 # TODO add a fully not erroring get_prefix
-bot = edoC()
+with startup.step("edoC()"):
+    bot = edoC(startup=startup)
 environ["JISHAKU_HIDE"] = "True"
 environ["JISHAKU_NO_UNDERSCORE"] = "True"
 NO_LOAD_COG = ''
@@ -77,17 +82,23 @@ def setup_logging():
             logger.removeHandler(handler)  # type: ignore
 
 
+deferred = config.get("startup", {}).get("deferred_cogs", DEFERRED_COGS)
 try:
-    bot.load_extension("jishaku")
-    for file in listdir("cogs"):
+    startup.load_extension(bot, "jishaku")
+    for file in sorted(listdir("cogs")):
         if NO_LOAD_COG:
             if file.startswith(NO_LOAD_COG):
                 continue
         if file.endswith(".py"):
             name = file[:-3]
-            bot.load_extension(f"cogs.{name}")
+            if name in deferred:
+                # loaded by edoC.on_ready
+                startup.defer(f"cogs.{name}")
+            else:
+                startup.load_extension(bot, f"cogs.{name}")
 except Exception:
     raise ChildProcessError("Problem with one of the cogs/utils")
+startup.mark("core cogs loaded")
 
 try:
     with setup_logging():
@@ -6,6 +6,7 @@
 #  file that should have been included as part of this package.                                    +
 # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 import logging
+import time
 from io import BytesIO
 from typing import Union
 
@@ -21,6 +22,31 @@ from utils.vars import *
 class edoCContext(Context):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        # perf_counter marks for utils.cmdtiming, received_at is set by edoC.on_message
+        # and built_at by edoC.get_context once the prefix and command are resolved
+        self.received_at = None
+        self.built_at = time.perf_counter()
+        self.prepared_at = None
+        self.send_seconds = 0.0
+        self._sending = False
+
+    async def _timed_send(self, coro):
+        # reply goes through send on some versions, only the outermost call counts
+        if self._sending:
+            return await coro
+        self._sending = True
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self._sending = False
+            self.send_seconds += time.perf_counter() - start
+
+    async def send(self, *args, **kwargs):
+        return await self._timed_send(super().send(*args, **kwargs))
+
+    async def reply(self, *args, **kwargs):
+        return await self._timed_send(super().reply(*args, **kwargs))
 
     @property
     def session(self):
@@ -7,7 +7,7 @@
 # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 from urllib.parse import quote
 
-import aiohttp
+from utils.http import clients
 
 
 class Invalid_endpoint(BaseException):
@@ -21,7 +21,7 @@ class SRA:
         key = Your SRA api key
         """
         self.apiKey = key
-        self.session = session or aiohttp.ClientSession()
+        self.session = session or clients.get("sra")
         self.baseUrl = (
             "https://some-random-api.ml/"
         )
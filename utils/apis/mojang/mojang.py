@@ -39,7 +39,7 @@ from time import time
 from typing import Union, Optional
 from .models import UserProfile
 from .exceptions import MojangError
-from utils.http import session
+from utils.http import clients
 # THIS IS A MODIFIED VERSION OF summer's wrapper
 # This one is async
 from ast import literal_eval
@@ -48,9 +48,10 @@ from logging import getLogger
 from time import time
 from typing import Union, Optional
 
-from utils.http import session
+from utils.http import clients
 from .exceptions import MojangError
 from .models import UserProfile
+from .resolver import UUIDResolver
 
 log = getLogger(__name__)
 
@@ -75,10 +76,10 @@ class MojangAPI:
         """
 
         if timestamp is None:
-            timestamp_now = int(time() * 1000.0)
-            timestamp = int((timestamp_now - cls._NAME_HOLD_DURATION) / 1000)
+            # the current owner, batched with every other lookup going on right now
+            return await resolver.uuid(username)
 
-        resp = await session.get(f"https://api.mojang.com/users/profiles/minecraft/{username}?at={timestamp}")
+        resp = await clients.get("mojang").get(f"users/profiles/minecraft/{username}?at={timestamp}")
         if resp.ok:
             try:
                 json = await resp.json()
@@ -101,7 +102,7 @@ class MojangAPI:
         """
         if len(names) > 10:
             names = names[:10]
-        async with session.post("https://api.mojang.com/profiles/minecraft", data=names) as ses:
+        async with clients.get("mojang").post("profiles/minecraft", json=names) as ses:
             data = await ses.json()
 
         if not isinstance(data, list):
@@ -126,7 +127,7 @@ class MojangAPI:
         Returns:
             str: UUID if username exists. None otherwise.
         """
-        resp = await session.get(f"https://sessionserver.mojang.com/session/minecraft/profile/{uuid}")
+        resp = await clients.get("mojang").get(f"https://sessionserver.mojang.com/session/minecraft/profile/{uuid}")
         if resp.ok:
             json = await resp.json()
             return json["name"]
@@ -145,7 +146,7 @@ class MojangAPI:
         uuid = cls.get_uuid(username)
         if not uuid:
             raise ValueError("Username is invalid. Failed to convert username to UUID")
-        resp = await session.get(f"https://api.mojang.com/user/profiles/{uuid}/names")
+        resp = await clients.get("mojang").get(f"user/profiles/{uuid}/names")
         name_changes = [name_change for name_change in reversed(await resp.json())]
         for i, name_info in enumerate(name_changes):
             if name_info["name"].lower() == username.lower():
@@ -169,7 +170,7 @@ class MojangAPI:
             is_legacy_profile (bool): Check if the profile is legacy
             timestamp (int): Timestamp of when the profile was retrieved
         """
-        resp = await session.get(f"https://sessionserver.mojang.com/session/minecraft/profile/{uuid}")
+        resp = await clients.get("mojang").get(f"https://sessionserver.mojang.com/session/minecraft/profile/{uuid}")
         try:
             js = await resp.json()
             value = js["properties"][0]["value"]
@@ -188,7 +189,7 @@ class MojangAPI:
             list: A list of dictionaries, each of which contains a name:changed_to_at pair.
                 If changed_to_at is set to 0, it is because it is the profile's first name.
         """
-        ses = await session.get(f"https://api.mojang.com/user/profiles/{uuid}/names")
+        ses = await clients.get("mojang").get(f"user/profiles/{uuid}/names")
         name_history = await ses.json()
 
         name_data = list()
@@ -210,7 +211,7 @@ class MojangAPI:
             dict: Returns dictionary with status of various Mojang services.
                 Possible values are green (no issues), yellow (some issues), red (service unavailable).
         """
-        re = await session.get("https://status.mojang.com/check")
+        re = await clients.get("mojang").get("https://status.mojang.com/check")
         data = await re.json()
 
         servers = dict()
@@ -224,7 +225,7 @@ class MojangAPI:
         """Returns a list of SHA1 hashes of current blacklisted servers that do not follow EULA.
         These servers have to abide by the EULA or be shut down forever. The hashes are not cracked.
         """
-        return await session.get("https://sessionserver.mojang.com/blockedservers").text.splitlines()
+        return await clients.get("mojang").get("https://sessionserver.mojang.com/blockedservers").text.splitlines()
 
     @staticmethod
     async def get_sale_statistics(item_sold_minecraft: bool = True,
@@ -246,10 +247,13 @@ class MojangAPI:
         if not options:
             raise MojangError("Invalid parameters supplied. Include at least one metric key.")
 
-        sepo = await session.post("https://api.mojang.com/orders/statistics", data={"metricKeys": options})
+        sepo = await clients.get("mojang").post("orders/statistics", data={"metricKeys": options})
         data = await sepo.json()
         metrics = dict()
         metrics["total"] = data["total"]
         metrics["last24h"] = data["last24h"]
         metrics["sale_velocity_per_seconds"] = data["saleVelocityPerSeconds"]
         return metrics
+
+
+resolver = UUIDResolver(MojangAPI.get_uuids)
@@ -0,0 +1,146 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+Name -> uuid lookups batched into mojang's bulk endpoint.
+
+Lookups that come in within `window` seconds of each other go out together
+as one POST /profiles/minecraft (at most `batch_size` names, mojang's limit
+is 10), the answers are handed back to everyone waiting on them. Both found
+and not found names are cached, the not found ones for a shorter time since
+a name can get claimed.
+
+With a `store` (the bot's HTTPCache) found names are also kept on disk for
+`ttl`, under the single name profile url, so they survive restarts. Memory
+is checked first, then the disk, then mojang.
+"""
+import asyncio
+import json
+import logging
+import re
+
+from utils.cache import AsyncTTLCache
+from utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+VALID_NAME = re.compile(r"^[A-Za-z0-9_]{1,16}$")
+NOT_FOUND = ()
+PROFILE_URL = "https://api.mojang.com/users/profiles/minecraft/"
+
+bulk_requests = registry.counter("edoc_mojang_bulk_requests_total", "Bulk name lookups sent to mojang")
+resolved_names = registry.counter("edoc_mojang_names_total", "Name lookups by where the answer came from",
+                                  ("result",))
+
+
+class UUIDResolver:
+    def __init__(self, lookup, *, window: float = 0.05, batch_size: int = 10, ttl: float = 3600,
+                 negative_ttl: float = 300, store=None):
+        """ lookup(names) -> {name: uuid} with the names case corrected, like MojangAPI.get_uuids """
+        self.lookup = lookup
+        self.store = store
+        self.window = window
+        self.batch_size = batch_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache = AsyncTTLCache(maxbytes=4 * 1024 ** 2, ttl=ttl)
+        self._waiters = {}
+        self._queue = []
+        self._timer = None
+
+    async def resolve(self, name: str):
+        """ (name, uuid) with the name's real capitalisation, None if there's no such account """
+        key = name.lower()
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.hits += 1
+            resolved_names.inc(result="cached")
+            return cached or None
+        if not VALID_NAME.match(name):
+            # mojang rejects the whole batch over a single bad name
+            resolved_names.inc(result="invalid")
+            return None
+
+        future = self._waiters.get(key)
+        if future is None:
+            self.cache.misses += 1
+            future = self._waiters[key] = asyncio.get_running_loop().create_future()
+            if self.store is not None:
+                asyncio.get_running_loop().create_task(self._load(key))
+            else:
+                self._enqueue(key)
+        else:
+            self.cache.coalesced += 1
+        return await asyncio.shield(future)
+
+    async def uuid(self, name: str):
+        found = await self.resolve(name)
+        return found[1] if found else None
+
+    def _enqueue(self, key):
+        self._queue.append(key)
+        if len(self._queue) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+    async def _load(self, key):
+        try:
+            stored = await self.store.load(PROFILE_URL + key)
+            data = stored.json() if stored is not None else None
+            result = (data["name"], data["id"]) if data else None
+        except Exception:
+            log.exception("reading %s from the http cache failed", key)
+            result = None
+        if result is None:
+            self._enqueue(key)
+            return
+        self.cache.set(key, result, ttl=self.ttl)
+        resolved_names.inc(result="stored")
+        future = self._waiters.pop(key)
+        if not future.done():
+            future.set_result(result)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        loop = asyncio.get_running_loop()
+        while self._queue:
+            batch, self._queue = self._queue[:self.batch_size], self._queue[self.batch_size:]
+            loop.create_task(self._send(batch))
+
+    async def _send(self, batch):
+        bulk_requests.inc()
+        try:
+            found = await self.lookup(batch)
+        except Exception as e:
+            for key in batch:
+                future = self._waiters.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+                    # nobody awaiting it anymore shouldn't log "exception was never retrieved"
+                    future.exception()
+            return
+        by_key = {name.lower(): (name, uuid) for name, uuid in found.items()}
+        for key in batch:
+            result = by_key.get(key)
+            self.cache.set(key, result or NOT_FOUND, ttl=self.ttl if result else self.negative_ttl)
+            resolved_names.inc(result="found" if result else "not_found")
+            future = self._waiters.pop(key)
+            if not future.done():
+                future.set_result(result)
+        if self.store is not None and by_key:
+            try:
+                for key, (name, uuid) in by_key.items():
+                    body = json.dumps({"id": uuid, "name": name}).encode()
+                    await self.store.store(PROFILE_URL + key, body, ttl=self.ttl)
+            except Exception:
+                log.exception("saving mojang names to the http cache failed")
+
+    def stats(self) -> dict:
+        return {**self.cache.stats(), "pending": len(self._waiters)}
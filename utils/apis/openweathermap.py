@@ -6,7 +6,7 @@
 #  file that should have been included as part of this package.                                    +
 # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 
-import aiohttp
+from utils.http import clients
 
 
 class CityNotFound(Exception):
@@ -114,7 +114,7 @@ class OpenWeatherAPI:
         key = Your openweather api key
         """
         self.apiKey = key
-        self.session = session or aiohttp.ClientSession()
+        self.session = session or clients.get("openweathermap")
         self.baseUrl = (
             "https://api.openweathermap.org/data/2.5/weather?{type}={query}&appid={key}"
         )
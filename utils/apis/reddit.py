@@ -6,7 +6,7 @@
 #  file that should have been included as part of this package.                                    +
 # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 
-import aiohttp
+from utils.http import clients
 
 
 class Post:
@@ -51,7 +51,7 @@ class Subreddit:
 
 
 class Reddit:
-    def __init__(self, session=aiohttp.ClientSession(), defaultLimit: int = 100):
+    def __init__(self, session=None, defaultLimit: int = 100):
         """
         Wrapper for Reddit read-only API
         API Key not required, used to replace praw
@@ -60,7 +60,7 @@ class Reddit:
             "https://www.reddit.com/r/{subreddit}/{listingType}.json?limit={limit}"
         )
         self.defaultLimit = defaultLimit
-        self.session = session
+        self.session = session or clients.get("reddit")
 
     async def get(self, subreddit: str, _type: str, limit: int = None):
         """
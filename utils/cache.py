@@ -6,6 +6,12 @@
 #  file that should have been included as part of this package.                                    +
 # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 
+import asyncio
+import hashlib
+import json
+import sys
+import time
+from collections import OrderedDict
 from datetime import datetime
 from functools import wraps
 
@@ -37,29 +43,150 @@ def cache(maxsize=128):
     return decorator
 
 
-def async_cache(maxsize=128):
-    cache = {}
+def stable_key(*args, **kwargs) -> str:
+    """ The same hash for the same call, whatever order dicts like headers or params were built in """
+    raw = json.dumps([args, kwargs], sort_keys=True, default=repr, separators=(",", ":"))
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def sizeof(value) -> int:
+    """ Rough bytes a cached value holds, good enough to keep the cache under its budget """
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value) + 49
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class AsyncTTLCache:
+    """
+    LRU bounded by the total size of its values, each entry expires after `ttl` seconds.
+    Concurrent misses on the same key share a single call (single-flight), exceptions aren't cached.
+    When the call raises one of `stale_on` an expired entry that's still around is served instead.
+    """
+
+    def __init__(self, *, maxbytes: int = 16 * 1024 ** 2, ttl: float = 300, maxsize: int = None,
+                 stale_on: tuple = ()):
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stale_on = stale_on
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.coalesced = self.stale = 0
+        # key -> (expires, size, value), least recently used first
+        self._entries = OrderedDict()
+        self._inflight = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= time.monotonic():
+            self._drop(key)
+            return default
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def set(self, key, value, ttl: float = None):
+        size = sizeof(value)
+        if size > self.maxbytes:
+            # would push everything else out and still not fit
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), size, value)
+        self.bytes += size
+        while self.bytes > self.maxbytes or (self.maxsize is not None and len(self._entries) > self.maxsize):
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def purge(self) -> int:
+        """ Drops every expired entry, returns how many went """
+        now = time.monotonic()
+        expired = [key for key, (expires, _, _) in self._entries.items() if expires <= now]
+        for key in expired:
+            self._drop(key)
+        return len(expired)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    async def get_or_call(self, key, func, *args, **kwargs):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+        waiting = self._inflight.get(key)
+        if waiting is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(waiting)
+            except asyncio.CancelledError:
+                if not waiting.cancelled():
+                    raise
+                # the caller doing the actual work got cancelled, not us
+                return await self.get_or_call(key, func, *args, **kwargs)
+
+        self.misses += 1
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            if entry is not None and isinstance(e, self.stale_on) and key in self._entries:
+                self.stale += 1
+                future.set_result(entry[2])
+                return entry[2]
+            future.set_exception(e)
+            # nobody else waiting shouldn't turn into "exception was never retrieved"
+            future.exception()
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self.bytes, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "coalesced": self.coalesced, "stale": self.stale}
+
+
+def async_cache(maxsize=128, *, maxbytes: int = 16 * 1024 ** 2, ttl: float = 300, key=stable_key,
+                stale_on: tuple = ()):
+    """
+    Caches a coroutine function's results in an AsyncTTLCache, pass no_cache=True to skip it.
+    `key` turns the call's arguments into the cache key.
+    """
+    store = AsyncTTLCache(maxbytes=maxbytes, ttl=ttl, maxsize=maxsize, stale_on=stale_on)
 
     def decorator(func):
         @wraps(func)
         async def inner(*args, no_cache=False, **kwargs):
             if no_cache:
                 return await func(*args, **kwargs)
+            return await store.get_or_call(key(*args, **kwargs), func, *args, **kwargs)
 
-            key_base = "_".join(str(x) for x in args)
-            key_end = "_".join(f"{k}:{v}" for k, v in kwargs.items())
-            key = f"{key_base}-{key_end}"
-
-            if key in cache:
-                return cache[key]
-
-            res = await func(*args, **kwargs)
-
-            if len(cache) > maxsize:
-                del cache[list(cache.keys())[0]]
-                cache[key] = res
-
-            return res
+        inner.cache = store
+        inner.clear = store.clear
         return inner
     return decorator
 
@@ -54,7 +54,7 @@ class GuildNotFound(CommandError):
 
 async def stealer_check(ctx, id, bot):
     msg = await ctx.invis('Checking if you steal code...')
-    stealers = bot.get_data('codestealers')
+    stealers = bot.get_data('codestealers', ())
     if id in stealers:
         return await ctx.error('Hey bro you steal code not cool')
     await msg.delete()
@@ -0,0 +1,129 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+The worker side of cluster.py.
+
+cluster.py starts one index.py per cluster with the shard range in the
+environment (EDOC_CLUSTER_ID, EDOC_SHARD_IDS, EDOC_SHARD_COUNT) and an IPC
+address + secret (EDOC_IPC, EDOC_IPC_SECRET). The IPC is newline separated
+JSON over a localhost TCP socket:
+
+    worker -> launcher  {"op": "hello", "cluster": 0, "secret": "..."}
+    worker -> launcher  {"op": "stats", "guilds": 120, "members": 40000}
+    launcher -> worker  {"op": "totals", "guilds": 480, "members": 161000, "clusters": 4}
+
+Without those variables index.py runs every shard in one process like it
+always did and ClusterInfo.from_env() returns None.
+"""
+import asyncio
+import json
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+# exit codes, see docs/notes/notes.md. POSIX only keeps the low byte so 600 shows up as 88
+SHUTDOWN = 600
+RESTART = 601
+
+
+def exit_kind(code: int):
+    """ "shutdown", "restart" or None for an exit code from index.py """
+    if code in (SHUTDOWN, SHUTDOWN % 256):
+        return "shutdown"
+    if code in (RESTART, RESTART % 256):
+        return "restart"
+    return None
+
+
+async def send(writer, **message):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+class ClusterInfo:
+    def __init__(self, cluster_id: int, shard_ids: list, shard_count: int, ipc: str = None, secret: str = None):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.ipc = ipc
+        self.secret = secret
+
+    @classmethod
+    def from_env(cls, environ=os.environ):
+        if "EDOC_CLUSTER_ID" not in environ:
+            return None
+        return cls(
+            int(environ["EDOC_CLUSTER_ID"]),
+            [int(shard) for shard in environ["EDOC_SHARD_IDS"].split(",")],
+            int(environ["EDOC_SHARD_COUNT"]),
+            environ.get("EDOC_IPC"),
+            environ.get("EDOC_IPC_SECRET"),
+        )
+
+    def env(self) -> dict:
+        env = {
+            "EDOC_CLUSTER_ID": str(self.cluster_id),
+            "EDOC_SHARD_IDS": ",".join(map(str, self.shard_ids)),
+            "EDOC_SHARD_COUNT": str(self.shard_count),
+        }
+        if self.ipc:
+            env["EDOC_IPC"] = self.ipc
+            env["EDOC_IPC_SECRET"] = self.secret
+        return env
+
+
+class ClusterClient:
+    """ Keeps a connection to the launcher, reports this cluster's counts and holds the latest totals """
+
+    def __init__(self, info: ClusterInfo, *, retry: float = 5):
+        self.info = info
+        self.retry = retry
+        self.totals = {}
+        self._writer = None
+        self._task = None
+        self._last = None
+
+    def start(self):
+        if self._task is None and self.info.ipc:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def _run(self):
+        host, port = self.info.ipc.rsplit(":", 1)
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(host, int(port))
+                await send(writer, op="hello", cluster=self.info.cluster_id, secret=self.info.secret)
+                self._writer = writer
+                if self._last is not None:
+                    await send(writer, op="stats", **self._last)
+                while line := await reader.readline():
+                    message = json.loads(line)
+                    if message.get("op") == "totals":
+                        self.totals = message
+            except (OSError, ValueError) as e:
+                log.warning("cluster %s lost the launcher: %s", self.info.cluster_id, e)
+            self._writer = None
+            await asyncio.sleep(self.retry)
+
+    async def report(self, guilds: int, members: int):
+        self._last = {"guilds": guilds, "members": members}
+        if self._writer is None:
+            return
+        try:
+            await send(self._writer, op="stats", **self._last)
+        except OSError:
+            self._writer = None
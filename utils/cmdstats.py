@@ -0,0 +1,98 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+import json
+import time
+from collections import Counter, deque
+
+from apscheduler.triggers.interval import IntervalTrigger
+
+from utils.config import bot_data, cmd_stats, cmd_stats_daily, cmd_stats_hourly
+
+HOUR = 3600
+DAY = 86400
+WATERMARK = "cmd_stats_rolled_up"
+ROLLUPS = ((cmd_stats_hourly, "hour", HOUR), (cmd_stats_daily, "day", DAY))
+
+
+def _rollup(conn, retention_days):
+    """ Folds every cmd_stats row past the watermark into the hourly and daily tables """
+    row = conn.execute(bot_data.select_sql(("value",), ("name",)), (WATERMARK,)).fetchone()
+    start = json.loads(row[0]) if row else 0
+    end = conn.execute("SELECT MAX(rowid) FROM cmd_stats").fetchone()[0] or 0
+    if end <= start:
+        return 0
+
+    for table, bucket, size in ROLLUPS:
+        conn.execute(
+            f"INSERT INTO {table.__tablename__} (server, {bucket}, cmdName, uses) "
+            f"SELECT server, CAST(timestamp / {size} AS INTEGER) * {size}, cmdName, COUNT(*) FROM cmd_stats "
+            f"WHERE rowid > ? AND rowid <= ? GROUP BY 1, 2, 3 "
+            f"ON CONFLICT (server, {bucket}, cmdName) DO UPDATE SET uses = uses + excluded.uses",
+            (start, end)
+        )
+    conn.execute(bot_data.upsert_sql(("name", "value")), (WATERMARK, json.dumps(end)))
+    if retention_days:
+        # the newest row is kept so sqlite never hands out a rowid below the watermark again
+        conn.execute("DELETE FROM cmd_stats WHERE rowid < ? AND timestamp < ?",
+                     (end, time.time() - retention_days * DAY))
+    return end - start
+
+
+class CommandLog:
+    """
+    Ring buffer of command invocations.
+
+    record() is just a deque append, flush() writes the buffer into cmd_stats
+    with one executemany and rollup() folds the new rows into
+    cmd_stats_hourly/cmd_stats_daily so reads only scan the raw rows newer
+    than the last rollup. Reads never write, the scheduled rollup does that.
+    If the db stalls for long enough the oldest invocations fall off the
+    buffer, those get counted in `dropped`.
+    """
+
+    def __init__(self, maxlen: int = 10000, *, retention_days: int = 30):
+        self.buffer = deque(maxlen=maxlen)
+        self.retention_days = retention_days
+        self.dropped = 0
+
+    def record(self, ctx):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        server = ctx.guild.id if ctx.guild else 0
+        self.buffer.append((ctx.author.id, server, ctx.command.qualified_name, time.time()))
+
+    async def flush(self, db):
+        rows = list(self.buffer)
+        self.buffer.clear()
+        if rows:
+            await db.executemany(cmd_stats.insert_sql(("author", "server", "cmdName", "timestamp")), rows)
+        return len(rows)
+
+    async def rollup(self, db):
+        """ Flush then roll up, returns how many raw rows were folded in """
+        await self.flush(db)
+        return await db.transaction(_rollup, self.retention_days)
+
+    async def top(self, db, server: int, *, days: int = 7, limit: int = 10):
+        """ [(cmdName, uses)] for `server` over the last `days` days, today included """
+        since = (int(time.time()) // DAY - days + 1) * DAY
+        # one statement so the rollup can't move the watermark between reading the two tables
+        rows = await db.fetch(
+            "SELECT cmdName, SUM(uses) FROM ("
+            "SELECT cmdName, uses FROM cmd_stats_daily WHERE server = ? AND day >= ? UNION ALL "
+            "SELECT cmdName, 1 FROM cmd_stats WHERE server = ? AND timestamp >= ? AND rowid > "
+            f"COALESCE((SELECT CAST(value AS INTEGER) FROM bot_data WHERE name = '{WATERMARK}'), 0)"
+            ") GROUP BY cmdName", (server, since, server, since), raw=True
+        )
+        uses = Counter(dict(rows))
+        # and what's still waiting for the next flush
+        uses.update(name for _, guild, name, timestamp in self.buffer if guild == server and timestamp >= since)
+        return uses.most_common(limit)
+
+    def schedule(self, sched, db, minutes: float = 5):
+        sched.add_job(self.rollup, IntervalTrigger(minutes=minutes), args=(db,))
@@ -0,0 +1,96 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+End to end command timing, split into phases.
+
+    lookup   on_message until the context is built (prefix + command lookup)
+    prepare  context built until the before_invoke hook (checks, cooldowns, converters)
+    body     before_invoke until the command finished, minus the time spent sending
+    send     awaiting Discord in ctx.send/ctx.reply
+    total    on_message until the command finished
+
+discord.py runs checks and converters back to back inside Command.prepare
+with nothing to hook in between, so they share the prepare phase.
+
+Every finished command goes into edoc_command_phase_seconds and into a
+per command deque of (time, phases) used for the sliding window percentiles.
+"""
+import time
+from collections import deque
+
+from utils.metrics import registry
+
+PHASES = ("lookup", "prepare", "body", "send", "total")
+
+phase_seconds = registry.histogram("edoc_command_phase_seconds", "Command latency by phase", ("command", "phase"))
+
+
+def percentile(ordered: list, p: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+class CommandTimings:
+    def __init__(self, *, window: float = 900, samples: int = 512):
+        self.window = window
+        self._samples = {}
+        self._maxlen = samples
+
+    @staticmethod
+    def prepared(ctx):
+        """ before_invoke hook """
+        ctx.prepared_at = time.perf_counter()
+
+    def finish(self, ctx):
+        """ Records a finished (or failed) command, returns its phases or None if it never got marked """
+        if getattr(ctx, "received_at", None) is None or ctx.command is None:
+            return None
+        end = time.perf_counter()
+        total = end - ctx.received_at
+        lookup = ctx.built_at - ctx.received_at
+        if ctx.prepared_at is None:
+            # failed a check or a converter, everything after lookup was prepare
+            prepare, body = end - ctx.built_at, 0.0
+        else:
+            prepare, body = ctx.prepared_at - ctx.built_at, max(end - ctx.prepared_at - ctx.send_seconds, 0.0)
+        phases = (lookup, prepare, body, ctx.send_seconds, total)
+
+        name = ctx.command.qualified_name
+        for phase, took in zip(PHASES, phases):
+            phase_seconds.observe(took, command=name, phase=phase)
+        try:
+            samples = self._samples[name]
+        except KeyError:
+            samples = self._samples[name] = deque(maxlen=self._maxlen)
+        samples.append((time.monotonic(), phases))
+        return dict(zip(PHASES, phases))
+
+    def _recent(self, name: str, window: float):
+        cutoff = time.monotonic() - window
+        samples = self._samples.get(name, ())
+        return [phases for when, phases in samples if when >= cutoff]
+
+    def summary(self, name: str, window: float = None):
+        """ {phase: (p50, p95, p99)} plus the sample count for one command """
+        recent = self._recent(name, window or self.window)
+        out = {}
+        for i, phase in enumerate(PHASES):
+            ordered = sorted(phases[i] for phases in recent)
+            out[phase] = tuple(percentile(ordered, p) for p in (0.5, 0.95, 0.99))
+        return len(recent), out
+
+    def slowest(self, limit: int = 10, *, window: float = None, phase: str = "total"):
+        """ [(command, count, {phase: (p50, p95, p99)})] ordered by the p99 of `phase` """
+        rows = []
+        for name in list(self._samples):
+            count, summary = self.summary(name, window)
+            if count:
+                rows.append((name, count, summary))
+        rows.sort(key=lambda row: row[2][phase][2], reverse=True)
+        return rows[:limit]
@@ -5,10 +5,8 @@
 #  and is released under the "MIT License Agreement". Please see the LICENSE                       +
 #  file that should have been included as part of this package.                                    +
 # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-from time import time
 
 from utils import sqlite as db
-from utils.vars import default_prefix
 
 
 class users(db.Table):
@@ -30,10 +28,11 @@ class guild_perms(db.Table):
     admins = db.Column('INT', nullable=True)
 
 class prefixs(db.Table):
+    # a guild can have several prefixes, one row each, no rows means the default prefix
     id = db.Column("INT", nullable=False, primary_key=True)
-    prefix = db.Column('TEXT', nullable=False, default=default_prefix)
+    prefix = db.Column('TEXT', nullable=False, primary_key=True)
     author = db.Column('INT', nullable=False, default=845186772698923029)
-    timestamp = db.Column('timestamp', nullable=False, default=time())
+    timestamp = db.Column('REAL', nullable=False)
 
 class stats(db.Table):
     cmds_ran = db.Column('INT', nullable=False, default=0)
@@ -41,9 +40,30 @@ class stats(db.Table):
 
 class cmd_stats(db.Table):
     author = db.Column('INT', nullable=False)
-    server = db.Column('INT', nullable=False)
-    cmdName = db.Column('TEXT', nullable=False)
-    timestamp = db.Column('timestamp', nullable=False, default=time())
+    server = db.Column('INT', nullable=False, index=True)
+    cmdName = db.Column('TEXT', nullable=False, index=True)
+    timestamp = db.Column('REAL', nullable=False, index=True)
 
+class cmd_stats_hourly(db.Table):
+    server = db.Column('INT', nullable=False, primary_key=True)
+    hour = db.Column('INT', nullable=False, primary_key=True, index=True)
+    cmdName = db.Column('TEXT', nullable=False, primary_key=True)
+    uses = db.Column('INT', nullable=False, default=0)
 
+class cmd_stats_daily(db.Table):
+    server = db.Column('INT', nullable=False, primary_key=True)
+    day = db.Column('INT', nullable=False, primary_key=True, index=True)
+    cmdName = db.Column('TEXT', nullable=False, primary_key=True)
+    uses = db.Column('INT', nullable=False, default=0)
 
+class todo(db.Table):
+    id = db.Column('INT', nullable=False, primary_key=True)
+    todo = db.Column('TEXT', nullable=False)
+    description = db.Column('TEXT', nullable=True)
+    time = db.Column('REAL', nullable=False)
+    message_url = db.Column('TEXT', nullable=True)
+    user_id = db.Column('INT', nullable=False, index=True)
+
+class bot_data(db.Table):
+    name = db.Column('TEXT', nullable=False, primary_key=True)
+    value = db.Column('TEXT', nullable=True)
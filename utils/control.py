@@ -0,0 +1,161 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+Local control plane, the owner commands without going through Discord.
+
+Listens on a unix socket ("socket" under "control" in config.json, with
+".<cluster id>" added when clustered) or on localhost, every request needs
+"Authorization: Bearer <control.token>" and it won't start at all without a
+token, set one yourself, there's no default.
+
+    GET  /stats                      counters, shards, loading_status, memory
+    GET  /cogs                       loaded extensions
+    POST /cogs/reload   {"name": "Fun"}   or {} for every loaded cog
+    POST /cache/flush   {"cache": "prefixes" | "perms" | "http" | "all"}
+    POST /config/reload              re-reads config.json
+
+    curl -H "Authorization: Bearer $TOKEN" localhost:9300/stats
+"""
+import logging
+import math
+import secrets
+import time
+
+from aiohttp import web
+
+log = logging.getLogger(__name__)
+
+
+def _error(status: int, message: str):
+    return web.json_response({"error": message}, status=status)
+
+
+class ControlServer:
+    def __init__(self, bot, *, token: str, host: str = "127.0.0.1", port: int = 9300, socket: str = None):
+        self.bot = bot
+        self.token = token
+        self.host = host
+        self.port = port
+        self.socket = socket
+        self._runner = None
+
+    @classmethod
+    def from_config(cls, bot, config: dict):
+        """ None when there's no token configured, an open control plane is worse than none """
+        section = config.get("control", {})
+        if not section.get("enabled", True) or not section.get("token"):
+            return None
+        socket = section.get("socket")
+        if socket and bot.cluster is not None:
+            # like the port, one socket per cluster process
+            socket = f"{socket}.{bot.cluster_id}"
+        return cls(bot, token=section["token"], host=section.get("host", "127.0.0.1"),
+                   port=section.get("port", 9300) + bot.cluster_id, socket=socket)
+
+    @web.middleware
+    async def authenticate(self, request, handler):
+        given = request.headers.get("Authorization", "")
+        if not secrets.compare_digest(given.encode(), f"Bearer {self.token}".encode()):
+            return _error(401, "missing or wrong token")
+        try:
+            return await handler(request)
+        except web.HTTPException:
+            raise
+        except Exception as e:
+            log.exception("control plane %s %s failed", request.method, request.path)
+            return _error(500, f"{type(e).__name__}: {e}")
+
+    @staticmethod
+    async def _body(request) -> dict:
+        if not request.can_read_body:
+            return {}
+        try:
+            body = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(text="body has to be JSON")
+        if not isinstance(body, dict):
+            raise web.HTTPBadRequest(text="body has to be a JSON object")
+        return body
+
+    # endpoints
+
+    async def stats(self, request):
+        bot = self.bot
+        members, guilds = bot.counts()
+        return web.json_response({
+            "user": str(bot.user),
+            "cluster": bot.cluster_id,
+            "uptime": time.time() - bot.uptime.timestamp(),
+            "ready": bot.is_ready(),
+            "loading_status": bot.loading_status,
+            "guilds": len(bot.guilds),
+            "members": sum(g.member_count for g in bot.guilds),
+            "total_guilds": guilds,
+            "total_members": members,
+            "shards": {str(shard): None if math.isnan(latency) else latency for shard, latency in bot.latencies},
+            "seen_messages": bot.seen_messages,
+            "total_commands_ran": bot.total_commands_ran,
+            "commands_ran": {name: count for name, count in bot.commands_ran.items() if count},
+            "rss": bot.process.memory_info().rss,
+            "extensions": sorted(bot.extensions),
+            "pending_deferred": list(bot.startup.deferred),
+            "http": bot.http_clients.policy.stats(),
+        })
+
+    async def cogs(self, request):
+        return web.json_response({"extensions": sorted(self.bot.extensions), "cogs": sorted(self.bot.cogs)})
+
+    async def reload_cogs(self, request):
+        name = (await self._body(request)).get("name")
+        if name:
+            names = [name if "." in name else f"cogs.{name}"]
+        else:
+            names = [extension for extension in self.bot.extensions if extension.startswith("cogs.")]
+        reloaded, failed = [], {}
+        for extension in names:
+            try:
+                self.bot.reload_extension(extension)
+            except Exception as e:
+                failed[extension] = f"{type(e).__name__}: {e}"
+            else:
+                reloaded.append(extension)
+        return web.json_response({"reloaded": reloaded, "failed": failed}, status=200 if not failed else 207)
+
+    async def flush_cache(self, request):
+        which = (await self._body(request)).get("cache", "all")
+        flushed = await self.bot.flush_caches(which)
+        if not flushed:
+            return _error(400, f"unknown cache {which!r}")
+        return web.json_response({"flushed": flushed})
+
+    async def reload_config(self, request):
+        fresh = self.bot.reload_config()
+        return web.json_response({"reloaded": True, "keys": sorted(fresh)})
+
+    # lifecycle
+
+    async def start(self):
+        app = web.Application(middlewares=[self.authenticate])
+        app.router.add_get("/stats", self.stats)
+        app.router.add_get("/cogs", self.cogs)
+        app.router.add_post("/cogs/reload", self.reload_cogs)
+        app.router.add_post("/cache/flush", self.flush_cache)
+        app.router.add_post("/config/reload", self.reload_config)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        if self.socket:
+            await web.UnixSite(self._runner, self.socket).start()
+            log.info("control plane on unix:%s", self.socket)
+        else:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+            log.info("control plane on http://%s:%s", self.host, self.port)
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
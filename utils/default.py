@@ -9,6 +9,8 @@ import functools
 import json
 import logging
 import math
+import signal
+import sqlite3
 import time
 import traceback
 from asyncio import sleep
@@ -16,7 +18,6 @@ from calendar import calendar
 from datetime import datetime
 from distutils.log import info
 from glob import glob
-from importlib import import_module
 from io import BytesIO
 from os import getpid, remove
 
@@ -30,13 +31,27 @@ from discord.utils import utcnow
 from psutil import Process
 
 # from lib.db import db
-from utils import sqlite
+import utils.config  # noqa: F401 registers the Tables that migrate() works from
+from utils import metrics, migrations, sqlite
 from utils.Context import edoCContext
 from utils.apis.Somerandomapi import SRA
+from utils.apis.mojang.mojang import resolver as mojang_names
 from utils.cache import CacheManager
+from utils.cluster import ClusterClient, ClusterInfo
+from utils.cmdstats import CommandLog
+from utils.cmdtiming import CommandTimings
+from utils.control import ControlServer
 from utils.help import PaginatedHelpCommand
-from utils.http import HTTPSession
+from utils.startup import Startup
+from utils.stats import StatsStore
+from utils.http import clients as http_clients, query
+from utils.httpcache import HTTPCache
+from utils.membercache import MemberCachePolicy
+from utils.memory import MemoryTracker
+from utils.perms import PermissionCache
+from utils.prefixes import PrefixCache
 from utils.vars import dark_blue, invis
+from utils.watchdog import LoopWatchdog
 
 BannedUsers = {}
 logger = logging.getLogger(__name__)
@@ -239,7 +254,8 @@ class BaseEmbed(discord.Embed):
 
 
 class edoC(commands.AutoShardedBot):
-    def __init__(self):
+    def __init__(self, startup: Startup = None):
+        self.startup = startup or Startup()
         if not hasattr(self, 'uptime'):
             self.uptime = datetime.now()
         self.config = config()
@@ -255,18 +271,33 @@ class edoC(commands.AutoShardedBot):
             reactions=True,
             presences=True,
         )
+        self.member_cache = MemberCachePolicy.from_config(self.config)
+        # set when cluster.py started this process for a slice of the shards
+        self.cluster = ClusterInfo.from_env()
+        shards = dict(shard_ids=self.cluster.shard_ids, shard_count=self.cluster.shard_count) if self.cluster else {}
+        pragmas = sqlite.pragmas_from_config(self.config)
+        with self.startup.step('migrations + stats'):
+            schema_db = sqlite.Database(pragmas=pragmas)
+            migrations.migrate(schema_db, verbose=True)
+            self.stats = StatsStore().load(schema_db)
+            schema_db.close()
         super().__init__(command_prefix=self.get_prefix, description=description,
                          pm_help=None, help_attrs=dict(hidden=True),
                          chunk_guilds_at_startup=False, heartbeat_timeout=150.0,
                          allowed_mentions=allowed_mentions, intents=intents,
+                         member_cache_flags=self.member_cache.cache_flags(intents),
                          owner_ids=confi["owners"], case_insensitive=True,
                          command_attrs=dict(hidden=True), help_command=PaginatedHelpCommand(),
-                         activity=discord.Game(
-                             type=discord.ActivityType.listening,
-                             name=f"Listening to over {self.get_data('MemberCount')} Members spread over {self.get_data('GuildCount')} Guilds!\nPrefix: ~"
-                         ), status=discord.Status.idle, )
-
-        self.session = HTTPSession(loop=self.loop)
+                         activity=self.make_activity(self.get_data('MemberCount'), self.get_data('GuildCount')),
+                         status=discord.Status.idle, **shards)
+        self.cluster_client = ClusterClient(self.cluster) if self.cluster else None
+
+        self.http_clients = http_clients
+        self.http_clients.configure(self.config.get('http', {}), loop=self.loop)
+        self.session = self.http_clients.session
+        self.http_cache = HTTPCache.from_config(self.config)
+        # resolved minecraft names go to disk too, so a restart doesn't ask mojang for all of them again
+        mojang_names.store = self.http_cache
         self.prefix = '~'
         self.process = Process(getpid())
         self.tempimgpath = 'data/img/temp/*'
@@ -275,22 +306,41 @@ class edoC(commands.AutoShardedBot):
         self.commands_ran = {}
         self.ready = False
         self.loading_status = {}
-        self.sra = SRA(session=self.session)
-        import os
-        for root, dirs, files in os.walk("utils"):
-            for f in files:
-                if f.endswith('.py'):
-                    import_module(str(os.path.relpath(os.path.join(root, f), "."))[:-3].replace('\\', '.'))
-        self.db = sqlite.Database()
-        if not self.create_drop_tables("create"):
-            print('hi')
+        self.sra = SRA()
+        self.db = sqlite.AsyncDatabase(readers=self.config.get('database', {}).get('readers', 4), pragmas=pragmas)
         self.seen_messages = 0
+        # the part of seen_messages that's already been added to the stored MsgsSeen
+        self._saved_messages = 0
         self.scheduler = apscheduler.schedulers.asyncio.AsyncIOScheduler()
+        self.db.schedule_checkpoint(self.scheduler, self.config.get('database', {}).get('checkpoint_minutes', 5))
         self.total_commands_ran = 0
+        self.command_log = CommandLog()
+        self.command_log.schedule(self.scheduler, self.db)
+        self.member_cache.schedule(self.scheduler, self, self.config.get('member_cache', {}).get('sweep_minutes', 5))
         self.alex_api = alexflipnote.Client(confi['alexflipnote_api'],
                                             loop=self.loop)  # just a example, the client doesn't have to be under bot and loop kwarg is optional
         self.cache = CacheManager()
-        self.prefixs = {}
+        self.prefixes = PrefixCache(self.prefix)
+        self.guild_perms = PermissionCache()
+        self.metrics = metrics.registry
+        self.messages_seen_metric = self.metrics.counter('edoc_messages_seen_total', 'Messages that reached on_message')
+        self.commands_metric = self.metrics.counter('edoc_commands_total', 'Commands invoked', ('cog',))
+        self.command_seconds = self.metrics.histogram('edoc_command_seconds', 'on_message until the command finished',
+                                                      ('cog', 'status'))
+        self.metrics.collector(self.collect_metrics)
+        metrics_config = self.config.get('metrics', {})
+        # one port per cluster process
+        self.metrics_server = metrics.MetricsServer(host=metrics_config.get('host', '127.0.0.1'),
+                                                    port=metrics_config.get('port', 9100) + self.cluster_id) \
+            if metrics_config.get('enabled', True) else None
+        self.control_server = ControlServer.from_config(self, self.config)
+        self.add_listener(self.on_command_failed, 'on_command_error')
+        self.command_timings = CommandTimings()
+        self.memory = MemoryTracker()
+        self.before_invoke(self.mark_prepared)
+        watchdog_config = self.config.get('watchdog', {})
+        self.watchdog = LoopWatchdog(interval=watchdog_config.get('interval', 0.1),
+                                     threshold=watchdog_config.get('threshold', 0.25))
 
         # self.blacklist = Config('blacklist.json')
 
@@ -298,108 +348,86 @@ class edoC(commands.AutoShardedBot):
     #    if guild.id in self.blacklist:
     #        await guild.leave()
 
-    def create_drop_tables(self, method: str):
+    def create_drop_tables(self, method: str, pragmas: dict = None):
         all_tables = [g for g in sqlite.Table.all_tables()]
+        db = sqlite.Database(pragmas=pragmas)
         for table in all_tables:
             try:
-                getattr(table, method)()
+                getattr(table, method)(db=db)
             except Exception as e:
                 print(f'Could not {method} {table.__tablename__}.\n\nError: {e}')
             else:
                 print(f'[{table.__module__}] {method}ed {table.__tablename__}.')
+        db.close()
         return all_tables
 
+    @staticmethod
+    def make_activity(members, guilds):
+        return discord.Game(type=discord.ActivityType.listening,
+                            name=f"Listening to over {members} Members spread over {guilds} Guilds!\nPrefix: ~")
+
+    def counts(self):
+        """ (members, guilds) over every cluster when clustered, just this process otherwise """
+        if self.cluster_client is not None and self.cluster_client.totals:
+            return self.cluster_client.totals['members'], self.cluster_client.totals['guilds']
+        return sum(g.member_count for g in self.guilds), len(self.guilds)
+
+    async def sync_cluster(self):
+        """ Sends this cluster's counts to the launcher and puts the totals in the presence """
+        await self.cluster_client.report(len(self.guilds), sum(g.member_count for g in self.guilds))
+        members, guilds = self.counts()
+        activity = self.make_activity(members, guilds)
+        if self.activity is None or self.activity.name != activity.name:
+            await self.change_presence(activity=activity, status=discord.Status.idle)
+
     def backup_data(self):
-        self.save_data('MsgsSeen', str(self.seen_messages))
-        self.save_data('MemberCount', str(sum(g.member_count for g in self.guilds)))
-        self.save_data('GuildCount', str(len(self.guilds)))
-
-    def save_data(self, endpoint: str, changeto: str):
-        """ Temp db system """
-        db_name = 'C:\\Users\\Jason\\edoC\\tempdb.json'
-        with open(db_name, "r") as jsonFile:
-            data = json.load(jsonFile)
-        data[endpoint] = changeto
-        with open(db_name, "w") as jsonFile:
-            json.dump(data, jsonFile, indent=2)
-        jsonFile.close()
-
-    def get_data(self, endpoint):
-        """ Temp db system """
-        try:
-            with open('C:\\Users\\Jason\\edoC\\tempdb.json', 'r', encoding='utf8') as data:
-                jsondata = json.load(data)
-                return jsondata[endpoint]
-        except FileNotFoundError:
-            raise FileNotFoundError("JSON file wasn't found")
+        members, guilds = self.counts()
+        # every cluster adds to the same MsgsSeen, so only what's new since the last save goes in
+        self.stats.add('MsgsSeen', self.seen_messages - self._saved_messages)
+        self._saved_messages = self.seen_messages
+        self.save_data('MemberCount', str(members))
+        self.save_data('GuildCount', str(guilds))
+        self.stats.flush(self.db)
+
+    def save_data(self, endpoint: str, changeto):
+        """ Sets a stat in memory, it gets written on the next backup_data """
+        self.stats.set(endpoint, changeto)
+
+    def get_data(self, endpoint, default=0):
+        """ Reads a stat from memory, `default` if it was never saved (a fresh install) """
+        return self.stats.get(endpoint, default)
 
     @tasks.loop(seconds=25)
     async def update_data(self):
+        if self.cluster_client is not None:
+            await self.sync_cluster()
         self.backup_data()
 
     async def load_prefixs(self):
         await self.wait_until_ready()
         print('loading prefixs')
-        for guild in self.guilds:
-            data = self.db.fetch('SELECT prefix FROM prefixs WHERE id = ?', (guild.id,))
-            for dic in data:
-                for prefix in dic.values():
-                    self.prefixs[guild.id] = prefix
+        self.prefixes.set_user(self.user.id)
+        await self.prefixes.load(self.db)
         self.loading_status['Prefixs'] = True
 
     async def update_db(self):
+        """ Syncs the guilds and users tables with what the bot can currently see """
         print('starting to update db this might take a bit')
-        for guild in self.guilds:
-            self.db.execute("INSERT OR IGNORE INTO guilds (id) VALUES (?)",
-                            (guild.id,))
-            self.db.execute('INSERT OR IGNORE INTO prefixs (id, author, timestamp) VALUES (?, ?, ?)',
-                            (guild.id, self.user.id, time.time(),))
-        to_remove = []
-        allmembers = self.get_all_members()
-        for user in allmembers:
-            if user.bot:
-                continue
-            self.db.execute("INSERT OR IGNORE INTO users (id) VALUES (?)",
-                            (user.id,))
-        stored_members = self.db.fetch("SELECT id FROM users")
-        for member in stored_members:
-            id_ = member['id']
-            #print(id_)
-            if id_ not in allmembers:
-                print(f'id_ = {id_}, member = {member}')
-                to_remove.append(id_)
-
-        #print(to_remove)
-        # for id in to_remove:
-        #    print(f'deleting {id} from users')
-        #    self.db.execute("DELETE FROM users WHERE id = ?", (id,))
-
-        print("updated db")
+        guild_ids = [guild.id for guild in self.guilds]
+        user_ids = {user.id for user in self.get_all_members() if not user.bot}
+        try:
+            guild_diff = await self.db.reconcile('guilds', guild_ids)
+            user_diff = await self.db.reconcile('users', user_ids)
+        except sqlite3.Error:
+            log.exception("syncing the guilds and users tables failed")
+            return
+        # stale users are only counted, pass prune=True to delete them
+        print(f"updated db | guilds +{guild_diff.added} | "
+              f"users +{user_diff.added} ({user_diff.stale} stored users no longer seen)")
+        self.loading_status['Database'] = True
 
     async def get_prefix(self, msg):
-        guild = msg.guild
-        user_id = self.user.id
-        base = [f'<@!{user_id}> ', f'<@{user_id}> ']
-        if guild is None:
-            base.append(self.prefix)
-        else:
-            if guild.id in self.prefixs.keys():
-                base.extend(self.prefixs.get(guild.id, [self.prefix]))
-            else:
-                self.db.execute("INSERT OR IGNORE INTO prefixs (id) VALUES (?)",
-                                (guild.id,))
-                self.prefixs[guild.id] = self.db.fetch('SELECT prefix FROM prefixs WHERE id = ?', (guild.id,))
-                base.extend(self.prefixs.get(guild.id, [self.prefix]))
-        return base
-        # if guild is None:
-        #    return self.prefix
-        # elif guild.id in self.prefixs.keys():
-        #    print(self.prefixs[guild.id])
-        #    return self.prefixs[guild.id]
-        # else:
-        #    self.db.execute("INSERT OR IGNORE INTO prefixs (id) VALUES (?)",
-        #                    (guild.id,))
-        #    self.prefixs[guild.id] = when_mentioned_or(self.db.fetch('SELECT prefix FROM prefixs WHERE id = ?', (guild.id,)))
+        return self.prefixes.matcher(msg.guild.id if msg.guild else None)
 
     async def get_url(self, url) -> dict:
         async with self.session.get(url) as ses:
@@ -409,35 +437,94 @@ class edoC(commands.AutoShardedBot):
     async def on_message(self, msg):
         if not self.is_ready() or msg.author.bot or not can_handle(msg, "send_messages"):
             return
+        received_at = time.perf_counter()
         self.seen_messages += 1
-        if bool(msg.raw_mentions):
-            if msg.raw_mentions[0] == 845186772698923029 and len(msg.content) == 22:
-                context = await self.get_context(msg, cls=edoCContext)
-                await context.send_help()
+        self.messages_seen_metric.inc()
+        if msg.guild is not None:
+            self.member_cache.touch(msg.guild.id, msg.author.id)
         ctx = await self.get_context(msg)
-        is_command = ctx.valid
-        if is_command:
-            check = await self.get_guild_permissions(ctx)
-            if not check:
+        ctx.received_at = received_at
+        if msg.raw_mentions and msg.raw_mentions[0] == 845186772698923029 and len(msg.content) == 22:
+            await ctx.send_help()
+        if ctx.valid:
+            if ctx.guild is not None and not self.guild_perms.has_required(ctx.guild):
                 return await self.send_missing_perms(ctx)
-            await self.process_commands(msg)
+            self.watchdog.track(ctx)
+            # invoke straight away, process_commands would build the context a second time
+            await self.invoke(ctx)
 
     async def exit(self, code):
         await sleep(3)
         exit(code)
 
+    def handle_sigterm(self):
+        """ cluster.py stops workers with SIGTERM, make that a normal close() so everything gets flushed """
+        try:
+            # after run() has put its own handlers in, this one replaces its plain loop.stop()
+            self.loop.add_signal_handler(signal.SIGTERM, lambda: self.loop.create_task(self.close()))
+        except (NotImplementedError, RuntimeError):
+            # windows
+            pass
+
+    @property
+    def cluster_id(self) -> int:
+        return self.cluster.cluster_id if self.cluster else 0
+
+    def reload_config(self):
+        """ Re-reads config.json into the dicts everyone already holds, cogs with their own copy need a reload """
+        fresh = config()
+        for held in (self.config, confi):
+            held.clear()
+            held.update(fresh)
+        return fresh
+
+    async def flush_caches(self, which: str = 'all'):
+        """ Empties one of the in memory caches (or all of them), returns the names that got flushed """
+        flushed = []
+        if which in ('prefixes', 'all'):
+            await self.prefixes.load(self.db)
+            flushed.append('prefixes')
+        if which in ('perms', 'all'):
+            self.guild_perms.invalidate()
+            flushed.append('perms')
+        if which in ('http', 'all'):
+            query.clear()
+            flushed.append('http')
+        return flushed
+
     async def close(self) -> None:
         self.update_data.stop()
+        self.watchdog.stop()
+        if self.cluster_client is not None:
+            await self.cluster_client.close()
         self.backup_data()
-        await self.session.close()
+        await self.http_cache.close()
+        await self.http_clients.close()
+        if self.metrics_server:
+            await self.metrics_server.close()
+        if self.control_server:
+            await self.control_server.close()
+        await self.command_log.flush(self.db)
+        await self.db.close()
         await self.exit(600)
         await super().close()
 
     async def restart(self) -> None:
         self.update_data.stop()
+        self.watchdog.stop()
+        if self.cluster_client is not None:
+            await self.cluster_client.close()
         self.backup_data()
+        # before exit(), it raises SystemExit so nothing after it runs
+        await self.http_cache.close()
+        await self.http_clients.close()
+        if self.metrics_server:
+            await self.metrics_server.close()
+        if self.control_server:
+            await self.control_server.close()
+        await self.command_log.flush(self.db)
+        await self.db.close()
         await self.exit(601)
-        await self.session.close()
         await super().close()
 
     def loading_emojis(self):
@@ -485,36 +572,61 @@ class edoC(commands.AutoShardedBot):
             except discord.HTTPException:
                 return None
             else:
+                # the member cache policy may have dropped them, put them back
+                guild._add_member(member)
+                self.member_cache.touch(guild.id, member_id)
                 return member
 
         members = await guild.query_members(limit=1, user_ids=[member_id], cache=True)
         if not members:
             return None
+        self.member_cache.touch(guild.id, member_id)
         return members[0]
 
     async def get_context(self, message, *, cls=edoCContext) -> edoCContext:
-        return await super().get_context(message, cls=cls)
+        ctx = await super().get_context(message, cls=cls)
+        # the context is built before the prefix/command lookup, so "lookup" ends here and not in __init__
+        ctx.built_at = time.perf_counter()
+        return ctx
 
     async def on_ready(self):
         """ The function that activates when boot was completed """
         logschannel = self.get_channel(self.config["edoc_non_critical_logs"])
-        await self.update_db()
+        self.loop.create_task(self.update_db())
         await self.load_prefixs()
         if not self.ready:
+            self.startup.mark('on_ready')
+            if self.cluster_client is not None:
+                self.cluster_client.start()
+            self.loop.create_task(self.load_deferred())
             for command in self.walk_commands():
                 self.commands_ran[f'{command.qualified_name}'] = 0
-            self.seen_messages = int(self.get_data('MsgsSeen'))
+            stored = int(self.get_data('MsgsSeen'))
+            self.seen_messages += stored
+            self._saved_messages += stored
             await emptyfolder(self.tempimgpath)
             self.update_data.start()
             self.ready = True
             self.scheduler.start()
+            self.watchdog.start()
+            self.handle_sigterm()
+            if self.metrics_server:
+                try:
+                    await self.metrics_server.start()
+                except OSError as e:
+                    print(f'Could not start the metrics endpoint: {e}')
+            if self.control_server:
+                try:
+                    await self.control_server.start()
+                except OSError as e:
+                    print(f'Could not start the control plane: {e}')
             await logschannel.send(f"{self.user} has been booted up")
             # Indicate that the bot has successfully booted up
             print(
                 f"Ready: {self.user} | Total members {sum(g.member_count for g in self.guilds)} | Guild count: {len(self.guilds)} | Guilds")
             guilds = {}
             for Server in self.guilds:
-                gprefix = self.prefixs[Server.id]
+                gprefix = ', '.join(self.prefixes.get(Server.id))
                 print(
                     f"{Server.id} ~ {Server} ~ {Server.owner} ~ {Server.member_count} ~ Prefix {gprefix}")
             self.loading_emojis()
@@ -530,26 +642,31 @@ class edoC(commands.AutoShardedBot):
             return self.icons['redTick']
 
     async def get_guild_permissions(self, ctx, return_dict=False):
-        all_perms = {}
-        admin = ctx.guild.me.guild_permissions.administrator
-        all_perms['Add Reactions'] = ctx.guild.me.guild_permissions.add_reactions
-        all_perms['View Audit Log'] = ctx.guild.me.guild_permissions.view_audit_log
-        all_perms['Read Messages'] = ctx.guild.me.guild_permissions.read_messages
-        all_perms['Send Messages'] = ctx.guild.me.guild_permissions.send_messages
-        all_perms['Embed Links'] = ctx.guild.me.guild_permissions.embed_links
-        all_perms['Attach Files'] = ctx.guild.me.guild_permissions.attach_files
-        all_perms['read Message History'] = ctx.guild.me.guild_permissions.read_message_history
-        all_perms['External Emojis'] = ctx.guild.me.guild_permissions.external_emojis
-        all_perms['Connect'] = ctx.guild.me.guild_permissions.connect
-        all_perms['Speak'] = ctx.guild.me.guild_permissions.speak
-
         # stealemoji cmd only manage_emojis = ctx.guild.me.guild_permissions.manage_emojis
         # needed for mod perms x = ctx.guild.me.guild_permissions.manage_roles
         if return_dict:
-            return all_perms
-        if all(all_perms.values()):
-            return True
-        return False
+            return self.guild_perms.required(ctx.guild)
+        return self.guild_perms.has_required(ctx.guild)
+
+    async def on_guild_role_create(self, role):
+        self.guild_perms.invalidate(role.guild.id)
+
+    async def on_guild_role_delete(self, role):
+        self.guild_perms.invalidate(role.guild.id)
+
+    async def on_guild_role_update(self, before, after):
+        self.guild_perms.invalidate(after.guild.id)
+
+    async def on_member_update(self, before, after):
+        if after.id == self.user.id:
+            self.guild_perms.invalidate(after.guild.id)
+
+    async def on_guild_update(self, before, after):
+        self.guild_perms.invalidate(after.id)
+
+    async def on_guild_remove(self, guild):
+        self.guild_perms.invalidate(guild.id)
+        self.member_cache.forget(guild.id)
 
     async def send_missing_perms(self, ctx):
         perms = await self.get_guild_permissions(ctx, return_dict=True)
@@ -571,6 +688,8 @@ class edoC(commands.AutoShardedBot):
         except KeyError:
             pass
         self.total_commands_ran += 1
+        self.command_log.record(ctx)
+        self.commands_metric.inc(cog=ctx.command.cog_name or 'None')
         # if ctx.author.id in BannedUsers:
         #    return
         # else:
@@ -596,6 +715,47 @@ class edoC(commands.AutoShardedBot):
         except:
             pass
 
+    async def mark_prepared(self, ctx):
+        self.command_timings.prepared(ctx)
+
+    def observe_command(self, ctx, status: str):
+        phases = self.command_timings.finish(ctx)
+        if phases is not None:
+            self.command_seconds.observe(phases['total'], cog=ctx.command.cog_name or 'None', status=status)
+
+    async def on_command_completion(self, ctx):
+        self.observe_command(ctx, 'ok')
+        if self.startup.mark('first command served'):
+            print(f'[startup] first command served {self.startup.now():.2f}s after the process started')
+
+    async def load_deferred(self):
+        failed = await self.startup.load_deferred(self)
+        for name, error in failed.items():
+            print(f'[startup] could not load {name}: {traceback_maker(error, advance=False)}')
+        print(f'[startup] timeline\n{self.startup.render()}')
+
+    async def on_command_failed(self, ctx, error):
+        self.observe_command(ctx, 'error')
+
+    def collect_metrics(self):
+        """ Runs right before every /metrics scrape, anything that's cheap to read but not worth tracking live """
+        gauge = self.metrics.gauge
+        gauge('edoc_process_resident_bytes', 'Resident set size').set(self.process.memory_info().rss)
+        gauge('edoc_guilds', 'Guilds the bot is in').set(len(self.guilds))
+        shard_latency = gauge('edoc_shard_latency_seconds', 'Heartbeat latency per shard', ('shard',))
+        for shard_id, latency in self.latencies:
+            if not math.isnan(latency):
+                shard_latency.set(latency, shard=shard_id)
+        metrics.report_cache('prefixes', self.prefixes.hits, self.prefixes.misses)
+        metrics.report_cache('guild_perms', self.guild_perms.hits, self.guild_perms.misses)
+        metrics.report_cache('http.query', query.cache.hits, query.cache.misses, query.cache.evictions,
+                             query.cache.coalesced)
+        metrics.report_cache('mojang.names', mojang_names.cache.hits, mojang_names.cache.misses,
+                             mojang_names.cache.evictions, mojang_names.cache.coalesced)
+        circuit = gauge('edoc_http_circuit_open', '1 while outbound requests to the host are failed fast', ('host',))
+        for host, state in self.http_clients.policy.hosts.items():
+            circuit.set(int(state.breaker.state == 'open'), host=host)
+
     async def fill_cache(self):
         """Loading up the blacklisted users."""
         # query = 'SELECT * FROM (SELECT guild_id AS snowflake_id, blacklisted  FROM guild_config  UNION ALL SELECT user_id AS snowflake_id, blacklisted  FROM users_data) WHERE blacklisted="TRUE"'
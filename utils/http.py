@@ -7,18 +7,56 @@
 # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 
 import asyncio
+import time
 
 import aiohttp
+import yarl
 
 from utils import cache
+from utils.httppolicy import RequestPolicy, UpstreamUnavailable
+from utils.metrics import http_seconds
+
+
+async def _request_start(session, ctx, params):
+    ctx.start = time.perf_counter()
+
+
+async def _request_end(session, ctx, params):
+    http_seconds.observe(time.perf_counter() - ctx.start, host=params.url.host, status=params.response.status)
+
+
+async def _request_exception(session, ctx, params):
+    http_seconds.observe(time.perf_counter() - ctx.start, host=params.url.host, status="error")
+
+
+def latency_trace():
+    """ TraceConfig that times every request into edoc_http_request_seconds """
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(_request_start)
+    trace.on_request_end.append(_request_end)
+    trace.on_request_exception.append(_request_exception)
+    return trace
 
 
 # Removes the aiohttp ClientSession instance warning.
 class HTTPSession(aiohttp.ClientSession):
     """ Abstract class for aiohttp. """
 
-    def __init__(self, loop=None):
-        super().__init__(loop=loop or asyncio.get_event_loop())
+    def __init__(self, loop=None, *, base_url: str = None, policy: RequestPolicy = None, **kwargs):
+        super().__init__(loop=loop or asyncio.get_event_loop(),
+                         trace_configs=[latency_trace(), *kwargs.pop("trace_configs", ())], **kwargs)
+        self.base_url = yarl.URL(base_url) if base_url else None
+        self.policy = policy
+
+    def _request(self, method, str_or_url, **kwargs):
+        # relative urls go to this api's base url, full ones are left alone
+        if self.base_url is not None:
+            url = yarl.URL(str_or_url)
+            if not url.is_absolute():
+                str_or_url = self.base_url.join(url)
+        if self.policy is None:
+            return super()._request(method, str_or_url, **kwargs)
+        return self.policy.request(super()._request, method, str_or_url, **kwargs)
 
     def __del__(self):
         """
@@ -34,12 +72,99 @@ class HTTPSession(aiohttp.ClientSession):
         pass
 
 
-session = HTTPSession()
-
-
-@cache.async_cache()
+# per api defaults, anything here can be overridden under "http" -> "apis" in config.json.
+# rate/burst/retries/breaker_* are per host, see utils/httppolicy.py
+APIS = {
+    "mojang": {"base_url": "https://api.mojang.com/", "timeout": 10, "rate": 1, "burst": 10},
+    "openweathermap": {"base_url": "https://api.openweathermap.org/", "timeout": 10, "rate": 1, "burst": 5},
+    "reddit": {"base_url": "https://www.reddit.com/", "timeout": 15, "rate": 1, "burst": 5,
+               "headers": {"User-Agent": "edoC discord bot"}},
+    "sra": {"base_url": "https://some-random-api.ml/", "timeout": 15, "rate": 2, "burst": 5},
+    "urbandictionary": {"base_url": "https://api.urbandictionary.com/", "timeout": 10, "rate": 2, "burst": 5},
+    "shiiyu": {"base_url": "https://sky.shiiyu.moe/", "timeout": 20, "rate": 1, "burst": 3},
+}
+
+
+class HTTPClients:
+    """
+    Owns every outbound HTTP session. They all share one TCPConnector so connections
+    (and their TLS handshakes) get reused across cogs and api wrappers.
+
+        clients.session           general purpose session, what bot.session is
+        clients.get("mojang")     session with mojang's base url, headers and timeout
+    """
+
+    def __init__(self, config: dict = None, *, loop=None):
+        self.loop = loop
+        self.config = config or {}
+        self._connector = None
+        self._sessions = {}
+        self.policy = RequestPolicy(self.config, APIS)
+
+    def configure(self, config: dict, *, loop=None):
+        """ Has to happen before the first session is made, that's when the connector gets built """
+        if self._connector is not None:
+            raise RuntimeError("HTTP clients are already in use, configure them before the first request")
+        self.config = config
+        self.loop = loop or self.loop
+        self.policy = RequestPolicy(config, APIS)
+
+    @property
+    def connector(self) -> aiohttp.TCPConnector:
+        if self._connector is None or self._connector.closed:
+            self._connector = aiohttp.TCPConnector(
+                loop=self.loop or asyncio.get_event_loop(),
+                limit=self.config.get("limit", 100),
+                limit_per_host=self.config.get("limit_per_host", 10),
+                ttl_dns_cache=self.config.get("dns_ttl", 300),
+                keepalive_timeout=self.config.get("keepalive", 30),
+                enable_cleanup_closed=True,
+            )
+        return self._connector
+
+    def _timeout(self, total: float) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=total, connect=self.config.get("connect_timeout", 5))
+
+    def _make(self, base_url: str = None, timeout: float = None, headers: dict = None) -> HTTPSession:
+        return HTTPSession(self.loop, base_url=base_url, policy=self.policy, connector=self.connector,
+                           connector_owner=False, timeout=self._timeout(timeout or self.config.get("timeout", 15)), headers=headers)
+
+    @property
+    def session(self) -> HTTPSession:
+        return self.get(None)
+
+    def get(self, name: str = None) -> HTTPSession:
+        """ The session for an api from APIS (or config), None for the general purpose one """
+        session = self._sessions.get(name)
+        if session is None or session.closed:
+            if name is None:
+                session = self._make()
+            else:
+                settings = {**APIS.get(name, {}), **self.config.get("apis", {}).get(name, {})}
+                session = self._make(settings.get("base_url"), settings.get("timeout"), settings.get("headers"))
+            self._sessions[name] = session
+        return session
+
+    async def close(self):
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+        if self._connector is not None:
+            await self._connector.close()
+            self._connector = None
+
+
+clients = HTTPClients()
+
+
+def _query_key(url, method="get", res_method="text", *args, **kwargs):
+    return cache.stable_key(method.upper(), str(url), res_method, *args, **kwargs)
+
+
+# while a host's circuit is open an expired answer beats an error
+@cache.async_cache(maxsize=None, maxbytes=16 * 1024 ** 2, ttl=300, key=_query_key, stale_on=(UpstreamUnavailable,))
 async def query(url, method="get", res_method="text", *args, **kwargs):
-    async with getattr(session, method.lower())(url, *args, **kwargs) as res:
+    async with getattr(clients.session, method.lower())(url, *args, **kwargs) as res:
         return await getattr(res, res_method)()
 
 
@@ -48,4 +173,5 @@ async def get(url, *args, **kwargs):
 
 
 async def post(url, *args, **kwargs):
-    return await query(url, "post", *args, **kwargs)
+    # never cached, posts aren't idempotent
+    return await query(url, "post", *args, no_cache=True, **kwargs)
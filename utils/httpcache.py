@@ -0,0 +1,261 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+GET responses kept on disk (data/db/http_cache.db) so they survive restarts.
+
+    res = await bot.http_cache.fetch(session, url, params=..., ttl=86400)
+    if res.status == 200:
+        data = res.json()
+
+While an entry is fresh it's served without asking upstream. Once it's
+stale it gets revalidated with If-None-Match / If-Modified-Since and a 304
+only bumps its expiry. Cache-Control max-age beats `ttl`, no-store is
+respected. Only 200s are stored. If upstream is down (or its circuit is
+open) a stale entry is served instead of the error.
+
+Things that don't come from a single GET (mojang's bulk lookups) can be
+kept under the GET url that would have returned them with store()/load().
+
+Everything over `max_bytes` is evicted least recently used first, anything
+untouched for `max_age` goes too.
+"""
+import asyncio
+import json
+import logging
+import time
+
+import aiohttp
+import yarl
+
+from utils import sqlite
+from utils.cache import stable_key
+from utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+lookups = registry.counter("edoc_http_cache_lookups_total", "On disk http cache lookups", ("result",))
+
+STORE = ("INSERT OR REPLACE INTO http_cache (key, url, body, content_type, etag, last_modified, stored_at, "
+         "expires_at, last_used, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+SCHEMA = ("""
+CREATE TABLE IF NOT EXISTS http_cache (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    body BLOB NOT NULL,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    size INTEGER NOT NULL
+)""", "CREATE INDEX IF NOT EXISTS http_cache_last_used ON http_cache (last_used)")
+
+
+def cache_control(header: str):
+    """ (seconds or None, no_store) from a Cache-Control header """
+    seconds, no_store = None, False
+    for directive in (header or "").lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        if name in ("no-store", "private"):
+            no_store = True
+        elif name == "max-age":
+            try:
+                seconds = int(value.strip('"'))
+            except ValueError:
+                pass
+    return seconds, no_store
+
+
+def _evict(conn, max_bytes: int, max_age: float):
+    """ Runs on the writer thread inside a transaction, returns how many rows went """
+    removed = conn.execute("DELETE FROM http_cache WHERE last_used < ?", (time.time() - max_age,)).rowcount
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+    if total <= max_bytes:
+        return removed
+    # down to 90% so the next few puts don't trigger another pass right away
+    target = total - max_bytes * 0.9
+    victims, freed = [], 0
+    for key, size in conn.execute("SELECT key, size FROM http_cache ORDER BY last_used"):
+        victims.append((key,))
+        freed += size
+        if freed >= target:
+            break
+    conn.executemany("DELETE FROM http_cache WHERE key = ?", victims)
+    return removed + len(victims)
+
+
+def absolute(session, url) -> yarl.URL:
+    """ url joined onto the session's base url when it's relative, so every api gets its own cache keys """
+    url = yarl.URL(str(url))
+    # utils.http.HTTPSession keeps it as base_url, a plain aiohttp session as _base_url
+    base_url = getattr(session, "base_url", None) or getattr(session, "_base_url", None)
+    if base_url is not None and not url.is_absolute():
+        url = yarl.URL(base_url).join(url)
+    return url
+
+
+class CachedResponse:
+    __slots__ = ("status", "body", "content_type", "from_cache")
+
+    def __init__(self, status: int, body: bytes, content_type: str = None, from_cache: bool = False):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.from_cache = from_cache
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class HTTPCache:
+    def __init__(self, path: str = "data/db/http_cache.db", *, max_bytes: int = 64 * 1024 ** 2,
+                 max_age: float = 30 * 86400, enabled: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.enabled = enabled
+        self.db = None
+        self._opening = None
+        self._inflight = {}
+        self.bytes = 0
+        self.stats = {"fresh": 0, "revalidated": 0, "stale": 0, "miss": 0, "evicted": 0}
+
+    @classmethod
+    def from_config(cls, config: dict):
+        section = config.get("http_cache", {})
+        return cls(section.get("path", "data/db/http_cache.db"),
+                   max_bytes=int(section.get("max_mb", 64) * 1024 ** 2),
+                   max_age=section.get("max_age_days", 30) * 86400, enabled=section.get("enabled", True))
+
+    async def open(self):
+        """ Opens (and creates) the cache db on first use, concurrent callers all wait on the same open """
+        if self._opening is None:
+            self._opening = asyncio.get_running_loop().create_task(self._open())
+        await self._opening
+
+    async def _open(self):
+        self.db = sqlite.AsyncDatabase(self.path, readers=2)
+        for statement in SCHEMA:
+            await self.db.execute(statement)
+        await self.evict()
+
+    async def evict(self) -> int:
+        removed = await self.db.transaction(_evict, self.max_bytes, self.max_age)
+        self.stats["evicted"] += removed
+        row = await self.db.fetchrow("SELECT COALESCE(SUM(size), 0) FROM http_cache", raw=True)
+        self.bytes = row[0]
+        return removed
+
+    def _count(self, result: str):
+        self.stats[result] += 1
+        lookups.inc(result=result)
+
+    async def fetch(self, session, url, *, params: dict = None, headers: dict = None, ttl: float = 3600):
+        """ GETs url through session unless there's a usable copy on disk, returns a CachedResponse """
+        if not self.enabled:
+            async with session.get(url, params=params, headers=headers) as res:
+                return CachedResponse(res.status, await res.read(), res.content_type)
+        await self.open()
+        url = absolute(session, url)
+        key = stable_key("GET", str(url), params, headers)
+        # concurrent lookups for the same key share one trip to disk/upstream
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.get_running_loop().create_task(
+                self._fetch(session, url, key, params, headers, ttl))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, session, url, key, params, headers, ttl):
+        row = await self.db.fetchrow(
+            "SELECT body, content_type, etag, last_modified, expires_at FROM http_cache WHERE key = ?", (key,)
+        )
+        now = time.time()
+        if row is not None and row.expires_at > now:
+            self._count("fresh")
+            self.db.writes.put("UPDATE http_cache SET last_used = ? WHERE key = ?", (now, key))
+            return CachedResponse(200, row.body, row.content_type, from_cache=True)
+
+        conditional = dict(headers or {})
+        if row is not None:
+            if row.etag:
+                conditional["If-None-Match"] = row.etag
+            if row.last_modified:
+                conditional["If-Modified-Since"] = row.last_modified
+        try:
+            async with session.get(url, params=params, headers=conditional) as res:
+                status, body, content_type = res.status, await res.read(), res.content_type
+                etag, last_modified = res.headers.get("ETag"), res.headers.get("Last-Modified")
+                seconds, no_store = cache_control(res.headers.get("Cache-Control"))
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            # includes UpstreamUnavailable from the request policy, a total timeout is a bare TimeoutError
+            if row is None:
+                raise
+            self._count("stale")
+            return CachedResponse(200, row.body, row.content_type, from_cache=True)
+
+        expires_at = time.time() + (ttl if seconds is None else seconds)
+        if status == 304 and row is not None:
+            self._count("revalidated")
+            await self.db.execute("UPDATE http_cache SET expires_at = ?, last_used = ?, etag = COALESCE(?, etag) "
+                                  "WHERE key = ?", (expires_at, now, etag, key))
+            return CachedResponse(200, row.body, row.content_type, from_cache=True)
+        if status >= 500 and row is not None:
+            self._count("stale")
+            return CachedResponse(200, row.body, row.content_type, from_cache=True)
+
+        self._count("miss")
+        if status == 200 and not no_store and len(body) <= self.max_bytes // 10:
+            await self.db.execute(
+                STORE, (key, str(url), body, content_type, etag, last_modified, now, expires_at, now, len(body))
+            )
+            self.bytes += len(body)
+            if self.bytes > self.max_bytes:
+                await self.evict()
+        return CachedResponse(status, body, content_type)
+
+    async def load(self, url, *, params: dict = None, headers: dict = None):
+        """ The fresh copy of a GET on disk as a CachedResponse, None if there isn't one. Never goes upstream """
+        if not self.enabled:
+            return None
+        await self.open()
+        key = stable_key("GET", str(url), params, headers)
+        row = await self.db.fetchrow("SELECT body, content_type FROM http_cache WHERE key = ? AND expires_at > ?",
+                                     (key, time.time()))
+        if row is None:
+            return None
+        self.db.writes.put("UPDATE http_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        return CachedResponse(200, row.body, row.content_type, from_cache=True)
+
+    async def store(self, url, body: bytes, *, ttl: float, content_type: str = "application/json",
+                    params: dict = None, headers: dict = None):
+        """ Keep `body` as if a GET for url had returned it, goes through the write-behind queue """
+        if not self.enabled:
+            return
+        await self.open()
+        key = stable_key("GET", str(url), params, headers)
+        now = time.time()
+        self.db.writes.put(STORE, (key, str(url), body, content_type, None, None, now, now + ttl, now, len(body)))
+        self.bytes += len(body)
+        if self.bytes > self.max_bytes:
+            await self.evict()
+
+    async def close(self):
+        if self._opening is not None:
+            await self._opening
+            await self.db.close()
+            self.db = self._opening = None
@@ -0,0 +1,274 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+What every outbound request goes through, per host:
+
+    token bucket     `rate` requests a second with bursts of `burst`, a 429's
+                     Retry-After pauses the whole host, not just that request
+    retries          idempotent requests get up to `retries` more tries on
+                     connection errors, timeouts, 429 and 502/503/504, with
+                     full jitter backoff. Every retry has to come out of one
+                     budget shared by all hosts, so an outage can't turn into
+                     a retry storm
+    circuit breaker  `breaker_threshold` failures in a row opens it, requests
+                     to that host then fail fast with UpstreamUnavailable for
+                     `breaker_reset` seconds before one trial request is let
+                     through, a 429 on that trial counts as a failure
+
+Settings come from the "http" section of config.json, per api (matched on
+its base_url's host) with the top level values as the defaults.
+"""
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+import yarl
+
+from utils.metrics import registry
+
+IDEMPOTENT = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+RETRY_STATUSES = frozenset((429, 502, 503, 504))
+FAILURE_STATUSES = frozenset((500, 502, 503, 504))
+
+DEFAULTS = {
+    "rate": 10,
+    "burst": 20,
+    "retries": 2,
+    "breaker_threshold": 5,
+    "breaker_reset": 30,
+}
+
+http_retries = registry.counter("edoc_http_retries_total", "Outbound requests that were retried", ("host",))
+http_rejected = registry.counter("edoc_http_rejected_total", "Outbound requests failed fast by the circuit breaker",
+                                 ("host",))
+http_rate_limited = registry.counter("edoc_http_rate_limited_total", "429s from upstream", ("host",))
+
+
+class UpstreamUnavailable(aiohttp.ClientConnectionError):
+    """ Raised instead of making the request, the host is down or asked us to back off """
+
+    def __init__(self, host: str, retry_after: float):
+        self.host = host
+        self.retry_after = retry_after
+        super().__init__(f"{host} isn't available right now, try again in {max(retry_after, 1):.0f} seconds.")
+
+
+def parse_retry_after(value: str):
+    """ Seconds from a Retry-After header (delta seconds or an http date), None if missing or unreadable """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def delay(self) -> float:
+        """ Takes a token and returns how long to wait before using it, tokens can go negative to queue callers up """
+        now = time.monotonic()
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        else:
+            wait = 0.0
+        return max(wait, self.blocked_until - now)
+
+    def refund(self):
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + 1)
+
+    def block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RetryBudget:
+    """ Every request puts `ratio` of a retry in, every retry takes one out, with a small floor refilled over time """
+
+    def __init__(self, ratio: float = 0.2, per_second: float = 1.0, cap: float = 20):
+        self.ratio = ratio
+        self.per_second = per_second
+        self.cap = cap
+        self.balance = cap
+        self.updated = time.monotonic()
+        self.exhausted = 0
+
+    def deposit(self):
+        self.balance = min(self.cap, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        now = time.monotonic()
+        self.balance = min(self.cap, self.balance + (now - self.updated) * self.per_second)
+        self.updated = now
+        if self.balance >= 1:
+            self.balance -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int = 5, reset: float = 30):
+        self.threshold = threshold
+        self.reset = reset
+        self.failures = 0
+        self.opened_at = None
+        self.trial_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset else "open"
+
+    def retry_in(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(self.opened_at + self.reset - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.reset:
+            return False
+        # half open, one trial at a time. A trial that never reported back (cancelled) expires after `reset`
+        if self.trial_at is None or now - self.trial_at >= self.reset:
+            self.trial_at = now
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = self.trial_at = None
+
+    def failure(self):
+        self.failures += 1
+        if self.trial_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+            self.trial_at = None
+
+    def rate_limited(self):
+        """ A 429 isn't the host failing, but a trial that gets one can't close the circuit either """
+        if self.trial_at is not None:
+            self.failure()
+
+
+class HostState:
+    def __init__(self, host: str, settings: dict):
+        self.host = host
+        self.retries = settings["retries"]
+        self.bucket = TokenBucket(settings["rate"], settings["burst"])
+        self.breaker = CircuitBreaker(settings["breaker_threshold"], settings["breaker_reset"])
+        self.counts = {"requests": 0, "retries": 0, "throttled": 0, "rate_limited": 0, "failures": 0,
+                       "rejected": 0}
+
+    def stats(self) -> dict:
+        return {**self.counts, "circuit": self.breaker.state, "tokens": round(self.bucket.tokens, 2)}
+
+
+class RequestPolicy:
+    def __init__(self, config: dict = None, apis: dict = None, *, max_wait: float = 10, backoff: float = 0.5,
+                 max_backoff: float = 8):
+        config = config or {}
+        self.defaults = {key: config.get(key, value) for key, value in DEFAULTS.items()}
+        self.max_wait = config.get("max_wait", max_wait)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = RetryBudget(config.get("retry_ratio", 0.2), config.get("retry_per_second", 1.0))
+        # host -> settings for the apis that override something
+        self.overrides = {}
+        for name, settings in (apis or {}).items():
+            settings = {**settings, **config.get("apis", {}).get(name, {})}
+            host = yarl.URL(settings["base_url"]).host if settings.get("base_url") else None
+            if host:
+                self.overrides[host] = {key: settings[key] for key in DEFAULTS if key in settings}
+        self.hosts = {}
+
+    def host(self, host: str) -> HostState:
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(host, {**self.defaults, **self.overrides.get(host, {})})
+        return state
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _can_retry(self, state: HostState, idempotent: bool, attempt: int) -> bool:
+        return (idempotent and attempt < state.retries and state.breaker.opened_at is None
+                and self.budget.withdraw())
+
+    async def request(self, send, method: str, url, **kwargs):
+        """ send(method, url, **kwargs) is the real request, ClientSession._request """
+        host = yarl.URL(url).host
+        state = self.host(host)
+        if not state.breaker.allow():
+            state.counts["rejected"] += 1
+            http_rejected.inc(host=host)
+            raise UpstreamUnavailable(host, state.breaker.retry_in())
+        idempotent = method.upper() in IDEMPOTENT
+        attempt = 0
+        while True:
+            wait = state.bucket.delay()
+            if wait > self.max_wait:
+                state.bucket.refund()
+                state.counts["rejected"] += 1
+                http_rejected.inc(host=host)
+                raise UpstreamUnavailable(host, wait)
+            if wait:
+                state.counts["throttled"] += 1
+                await asyncio.sleep(wait)
+            state.counts["requests"] += 1
+            self.budget.deposit()
+            try:
+                resp = await send(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                state.counts["failures"] += 1
+                state.breaker.failure()
+                if not self._can_retry(state, idempotent, attempt):
+                    raise
+            else:
+                if resp.status == 429:
+                    state.counts["rate_limited"] += 1
+                    http_rate_limited.inc(host=host)
+                    state.bucket.block(parse_retry_after(resp.headers.get("Retry-After")) or 1)
+                    state.breaker.rate_limited()
+                elif resp.status in FAILURE_STATUSES:
+                    state.counts["failures"] += 1
+                    state.breaker.failure()
+                else:
+                    state.breaker.success()
+                if resp.status not in RETRY_STATUSES or not self._can_retry(state, idempotent, attempt):
+                    return resp
+                resp.release()
+            attempt += 1
+            state.counts["retries"] += 1
+            http_retries.inc(host=host)
+            await asyncio.sleep(self._delay(attempt))
+
+    def stats(self) -> dict:
+        return {
+            "retry_budget": round(self.budget.balance, 2),
+            "retry_budget_exhausted": self.budget.exhausted,
+            "hosts": {host: state.stats() for host, state in self.hosts.items()},
+        }
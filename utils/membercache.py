@@ -0,0 +1,114 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+How many members discord keeps around per guild.
+
+    all    discord's default, every member (and their presence) stays cached
+    lru    at most `per_guild` members per guild, the ones that haven't spoken
+           or run a command for the longest get dropped on every sweep
+    voice  only members in voice channels (plus whoever discord adds for us)
+
+Members in voice, the guild owner and the bot itself are never evicted, and
+neither is anyone active in the last `keep_seconds`. Anything that needs a
+member that got dropped goes through edoC.get_or_fetch_member which asks
+discord again and puts them back.
+"""
+import time
+from collections import OrderedDict
+
+import discord
+from apscheduler.triggers.interval import IntervalTrigger
+
+from utils.metrics import registry
+
+POLICIES = ("all", "lru", "voice")
+
+evicted_members = registry.counter("edoc_member_cache_evictions_total", "Members dropped by the cache policy")
+cached_members = registry.gauge("edoc_member_cache_size", "Members cached over every guild")
+
+
+class MemberCachePolicy:
+    def __init__(self, policy: str = "all", *, per_guild: int = 1000, keep_seconds: float = 600):
+        if policy not in POLICIES:
+            raise ValueError(f"member cache policy has to be one of {POLICIES}, not {policy!r}")
+        self.policy = policy
+        self.per_guild = per_guild
+        self.keep_seconds = keep_seconds
+        # guild id -> OrderedDict(member id -> last seen), oldest first
+        self._seen = {}
+
+    @classmethod
+    def from_config(cls, config: dict):
+        section = config.get("member_cache", {})
+        return cls(section.get("policy", "all"), per_guild=section.get("per_guild", 1000),
+                   keep_seconds=section.get("keep_seconds", 600))
+
+    def cache_flags(self, intents: discord.Intents) -> discord.MemberCacheFlags:
+        if self.policy == "voice":
+            flags = discord.MemberCacheFlags.none()
+            flags.voice = intents.voice_states
+            return flags
+        return discord.MemberCacheFlags.from_intents(intents)
+
+    def touch(self, guild_id: int, member_id: int):
+        if self.policy != "lru":
+            return
+        try:
+            seen = self._seen[guild_id]
+        except KeyError:
+            seen = self._seen[guild_id] = OrderedDict()
+        seen[member_id] = time.monotonic()
+        seen.move_to_end(member_id)
+
+    def forget(self, guild_id: int):
+        self._seen.pop(guild_id, None)
+
+    def _protected(self, guild, member) -> bool:
+        return (member.id == guild.owner_id or member.id == guild._state.self_id
+                or (member.voice is not None and member.voice.channel is not None))
+
+    def sweep_guild(self, guild) -> int:
+        """ Evicts the least recently active members until the guild is at the cap, returns how many went """
+        seen = self._seen.get(guild.id, {})
+        for member_id in [member_id for member_id in seen if member_id not in guild._members]:
+            # left the guild or got dropped by discord itself
+            del seen[member_id]
+        over = len(guild._members) - self.per_guild
+        if over <= 0:
+            return 0
+        cutoff = time.monotonic() - self.keep_seconds
+        # never seen first (dict order), then least recently seen
+        order = [member_id for member_id in guild._members if member_id not in seen]
+        order.extend(member_id for member_id, when in seen.items() if when < cutoff)
+        evicted = 0
+        for member_id in order:
+            if evicted >= over:
+                break
+            member = guild._members.get(member_id)
+            if member is None or self._protected(guild, member):
+                continue
+            guild._remove_member(member)
+            seen.pop(member_id, None)
+            evicted += 1
+        return evicted
+
+    def sweep(self, guilds) -> int:
+        if self.policy != "lru":
+            return 0
+        evicted = sum(self.sweep_guild(guild) for guild in guilds)
+        evicted_members.inc(evicted)
+        cached_members.set(sum(len(guild._members) for guild in guilds))
+        return evicted
+
+    def schedule(self, sched, bot, minutes: float = 5):
+        async def job():
+            # a coroutine so apscheduler runs it on the loop, guild._members isn't ours to touch from a thread
+            self.sweep(bot.guilds)
+
+        if self.policy == "lru":
+            sched.add_job(job, IntervalTrigger(minutes=minutes))
@@ -0,0 +1,117 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+tracemalloc snapshots grouped by who allocated, for finding slow leaks.
+
+tracemalloc only sees allocations made after it starts, so the first
+snapshot starts tracing and later ones are diffed against it (or against the
+previous one). Every allocation is charged to the innermost frame that is our
+code (cogs.Skyblock, utils.http, ...), falling back to the top level package
+for library code (discord, aiohttp, ...). With a 10 frame traceback a member
+object made by discord.state while a cog asked for it still lands on the cog.
+"""
+import os
+import time
+import tracemalloc
+from collections import defaultdict
+
+ROOT = os.getcwd()
+OURS = ("cogs", "utils", "lib", "games")
+FRAMES = 10
+
+
+def _package(filename: str) -> str:
+    if filename.startswith(ROOT):
+        parts = os.path.relpath(filename, ROOT)[:-3].replace("\\", "/").split("/")
+        # cogs/Skyblock.py -> cogs.Skyblock, utils/apis/reddit.py -> utils.apis
+        return ".".join(parts[:2])
+    if "site-packages" in filename:
+        top = filename.split("site-packages", 1)[1].lstrip("\\/").split(os.sep)[0].split("/")[0]
+        return top[:-3] if top.endswith(".py") else top
+    if filename.startswith("<"):
+        return filename
+    return "stdlib"
+
+
+class MemoryTracker:
+    def __init__(self, frames: int = FRAMES):
+        self.frames = frames
+        self.baseline = None
+        self.previous = None
+        self.taken = None
+        self._packages = {}
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.baseline = self.previous = self._snapshot()
+        self.taken = time.time()
+
+    def stop(self):
+        tracemalloc.stop()
+        self.baseline = self.previous = None
+        self._packages.clear()
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def _owner(self, traceback) -> str:
+        fallback = None
+        # innermost first
+        for frame in reversed(traceback):
+            try:
+                package = self._packages[frame.filename]
+            except KeyError:
+                package = self._packages[frame.filename] = _package(frame.filename)
+            if package.startswith(OURS):
+                return package
+            if fallback is None:
+                fallback = package
+        return fallback or "unknown"
+
+    def diff(self, since: str = "previous"):
+        """
+        [(package, size diff, count diff, size now)] biggest growers first.
+        since is "previous" (last diff) or "baseline" (when tracing started).
+        """
+        if self.baseline is None:
+            raise RuntimeError("call start() first")
+        old = self.baseline if since == "baseline" else self.previous
+        new = self._snapshot()
+        grouped = defaultdict(lambda: [0, 0, 0])
+        for stat in new.compare_to(old, "traceback"):
+            row = grouped[self._owner(stat.traceback)]
+            row[0] += stat.size_diff
+            row[1] += stat.count_diff
+            row[2] += stat.size
+        self.previous = new
+        self.taken = time.time()
+        return sorted(((package, *row) for package, row in grouped.items()), key=lambda row: row[1], reverse=True)
+
+    @staticmethod
+    def overhead() -> int:
+        """ Bytes tracemalloc itself is using to store traces """
+        return tracemalloc.get_tracemalloc_memory()
+
+
+def humanize_bytes(size: int) -> str:
+    sign = "-" if size < 0 else "+"
+    size = abs(size)
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{sign}{size:.0f} {unit}" if unit == "B" else f"{sign}{size:.1f} {unit}"
+        size /= 1024
+    return f"{sign}{size:.2f} GiB"
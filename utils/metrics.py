@@ -0,0 +1,264 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+Counters, gauges and fixed bucket histograms, rendered in the Prometheus text format.
+
+Everything records into the module level `registry` so utils.sqlite/utils.http
+can time things without needing the bot. Values that are cheaper to read than
+to keep up to date (RSS, shard latency, cache ratios) are filled in by
+collectors that run right before each scrape.
+
+    commands = registry.counter("edoc_commands_total", "Commands invoked", ("cog",))
+    commands.inc(cog="Fun")
+"""
+import logging
+import time
+from bisect import bisect_left
+
+from aiohttp import web
+
+log = logging.getLogger(__name__)
+
+# seconds, good enough for everything from a sqlite read to a slow api
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value) -> str:
+    if isinstance(value, bool):
+        # str(True) isn't a sample value prometheus can parse
+        return str(int(value))
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labels)
+        self._values = {}
+
+    def _key(self, labels: dict):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes the labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def clear(self):
+        self._values.clear()
+
+    def samples(self):
+        """ (suffix, label values, extra labels, value) for every series """
+        for key, value in self._values.items():
+            yield "", key, (), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_labels(self.labelnames, key, extra)} {_number(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels):
+        """ For collectors mirroring a running total kept somewhere else, a drop reads as a counter reset """
+        self._values[self._key(labels)] = value
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = int(value) if isinstance(value, bool) else value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """ Per series a list of bucket counts (non cumulative) plus the sum, made cumulative on render """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        try:
+            series = self._values[key]
+        except KeyError:
+            # one slot per bucket, one for +Inf, then the sum
+            series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, **labels):
+        """ with histogram.time(cog="Fun"): ... """
+        return _Timed(self, labels)
+
+    def count(self, **labels):
+        series = self._values.get(self._key(labels))
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        for key, series in self._values.items():
+            running = 0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                running += count
+                yield "_bucket", key, (("le", _number(bound)),), running
+            yield "_sum", key, (), series[-1]
+            yield "_count", key, (), running
+
+
+class _Timed:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def _add(self, cls, name, *args, **kwargs):
+        try:
+            metric = self._metrics[name]
+        except KeyError:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+        if not isinstance(metric, cls):
+            raise ValueError(f"{name} is already registered as a {metric.kind}")
+        # modules get reloaded with the cogs, hand back the existing one
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: tuple = ()) -> Counter:
+        return self._add(Counter, name, documentation, labels)
+
+    def gauge(self, name: str, documentation: str, labels: tuple = ()) -> Gauge:
+        return self._add(Gauge, name, documentation, labels)
+
+    def histogram(self, name: str, documentation: str, labels: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram, name, documentation, labels, buckets=buckets)
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def collector(self, func):
+        """ Registers func to run before every render, usable as a decorator """
+        self._collectors.append(func)
+        return func
+
+    def collect(self):
+        for func in self._collectors:
+            try:
+                func()
+            except Exception:
+                log.exception("metrics collector %r failed", func)
+
+    def render(self) -> str:
+        self.collect()
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+db_seconds = registry.histogram("edoc_db_query_seconds", "Time spent on a database call, queue wait included",
+                                ("op",))
+http_seconds = registry.histogram("edoc_http_request_seconds", "Outbound HTTP request latency", ("host", "status"))
+cache_lookups = registry.counter("edoc_cache_lookups_total", "Lookups served by an in memory cache",
+                                 ("cache", "result"))
+cache_ratio = registry.gauge("edoc_cache_hit_ratio", "Hits / lookups for an in memory cache", ("cache",))
+cache_evictions = registry.counter("edoc_cache_evictions_total", "Entries pushed out of an in memory cache", ("cache",))
+
+
+def report_cache(name: str, hits: int, misses: int, evictions: int = None, coalesced: int = None):
+    """ For collectors, publishes a cache's counters and hit ratio """
+    cache_lookups.set_total(hits, cache=name, result="hit")
+    cache_lookups.set_total(misses, cache=name, result="miss")
+    if coalesced is not None:
+        cache_lookups.set_total(coalesced, cache=name, result="coalesced")
+    if evictions is not None:
+        cache_evictions.set_total(evictions, cache=name)
+    # a coalesced lookup didn't go upstream either, it counts as a hit
+    served = hits + (coalesced or 0)
+    total = served + misses
+    cache_ratio.set(served / total if total else 0.0, cache=name)
+
+
+class MetricsServer:
+    """ GET /metrics on a local port, meant for a Prometheus scraper on the same box """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, metrics: Registry = registry, *, host: str = "127.0.0.1", port: int = 9100):
+        self.registry = metrics
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def handle(self, request):
+        return web.Response(body=self.registry.render().encode(), headers={"Content-Type": self.content_type})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        log.info("serving metrics on http://%s:%s/metrics", self.host, self.port)
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,197 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+Versioned schema migrations for the utils.sqlite.Table subclasses.
+
+Every boot the declared schema (columns, types, NOT NULL, defaults, primary
+keys and index=True columns) gets fingerprinted. If the newest row in schema_versions
+has the same fingerprint nothing else happens. Otherwise the live schema is
+read with PRAGMA table_info/index_list, diffed against the Columns and the
+steps needed are applied in one transaction and recorded as a new version.
+
+Defaults have to be constants, a default computed at import (time()) would
+differ on every boot and rebuild the table every time.
+"""
+import hashlib
+import json
+import logging
+import time
+
+from utils import sqlite
+
+log = logging.getLogger(__name__)
+
+VERSION_TABLE = "schema_versions"
+
+
+def _default(sql):
+    """ sqlite drops the outer parentheses of a DEFAULT (expr) in table_info, so compare without them """
+    if sql is None:
+        return None
+    if sql.startswith("(") and sql.endswith(")"):
+        sql = sql[1:-1]
+    return sql.upper() if sql.upper() in ("TRUE", "FALSE", "NULL") else sql
+
+
+def declared_schema(table):
+    """ {column: (TYPE, notnull, pk, default)}, {index name: column} for a Table subclass """
+    columns = {
+        column.name: (column.column_type, not column.nullable, column.primary_key, _default(column.default_sql))
+        for column in table.columns
+    }
+    indexes = {column.index_name: column.name for column in table.columns if column.index}
+    return columns, indexes
+
+
+def live_schema(conn, name: str):
+    """ Same shape as declared_schema but read from the db, None if the table doesn't exist """
+    info = conn.execute(f"PRAGMA table_info('{name}')").fetchall()
+    if not info:
+        return None
+    columns = {
+        column: (column_type.upper(), bool(notnull), bool(pk), _default(default))
+        for _, column, column_type, notnull, default, pk in info
+    }
+    indexes = {}
+    for _, index, _, origin, *_ in conn.execute(f"PRAGMA index_list('{name}')").fetchall():
+        # auto indexes back PRIMARY KEY/UNIQUE constraints and aren't ours to manage
+        if origin != "c":
+            continue
+        indexed = conn.execute(f"PRAGMA index_info('{index}')").fetchall()
+        indexes[index] = indexed[0][2] if len(indexed) == 1 else None
+    return columns, indexes
+
+
+def fingerprint(tables):
+    schema = {table.__tablename__: declared_schema(table) for table in tables}
+    return hashlib.sha1(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+
+
+def current_version(conn):
+    """ (version, fingerprint) of the newest applied migration, (0, None) on a fresh db """
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} "
+        f"(version INTEGER PRIMARY KEY, fingerprint TEXT NOT NULL, applied_at REAL NOT NULL, steps TEXT)"
+    )
+    row = conn.execute(f"SELECT version, fingerprint FROM {VERSION_TABLE} ORDER BY version DESC LIMIT 1").fetchone()
+    return tuple(row) if row else (0, None)
+
+
+def _addable(column):
+    """ sqlite's ALTER TABLE ADD COLUMN can't add keys, UNIQUE, or NOT NULL without a default """
+    return not (column.primary_key or column.unique or (not column.nullable and column.default is None))
+
+
+def _fitting(conn, table, common):
+    """ How many live rows the rebuilt table takes: required columns set and one row per primary key """
+    name = table.__tablename__
+    required = [column for column in table.columns if not column.nullable and column.default is None]
+    if any(column.name not in common for column in required):
+        return 0
+    where = " AND ".join(f'"{column.name}" IS NOT NULL' for column in required) or "1"
+    keys = ", ".join(f'"{column.name}"' for column in table.columns if column.primary_key)
+    rows = f"SELECT DISTINCT {keys} FROM {name} WHERE {where}" if keys else f"SELECT 1 FROM {name} WHERE {where}"
+    return conn.execute(f"SELECT COUNT(*) FROM ({rows})").fetchone()[0]
+
+
+def _rebuild(conn, table, live_columns, live_indexes, version):
+    name = table.__tablename__
+    temp = f"{name}__migrating"
+    legacy = f"{name}_legacy_v{version}"
+    common = [column for column in table.columns if column.name in live_columns]
+    steps = [table.table_sql(exists_ok=False, name=temp)]
+    keep = not common
+    if common:
+        total = conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+        fitting = _fitting(conn, table, {column.name for column in common})
+        if fitting < total:
+            # NULL keys, duplicate ids, missing required values (build.sql's todo, old prefixs rows).
+            # Copy what fits, the untouched original stays next to it
+            log.warning("%s: %d of %d rows don't fit the new schema, the old table is kept as %s",
+                        name, total - fitting, total, legacy)
+            keep = True
+        columns = ", ".join(f'"{column.name}"' for column in common)
+        # a NULL where there's now a NOT NULL with a default gets the default instead of losing the row
+        values = ", ".join(
+            f'COALESCE("{column.name}", {column.default_sql})' if not column.nullable and column.default is not None
+            else f'"{column.name}"' for column in common
+        )
+        # rowid is copied too, cmdstats.rollup keeps a rowid watermark that fresh rowids would break
+        steps.append(f"INSERT OR IGNORE INTO {temp} (rowid, {columns}) SELECT rowid, {values} FROM {name}")
+    if keep:
+        # nothing in common means it's an old table under the same name (see build.sql), keep it around.
+        # its indexes would go with it under their old names and the CREATE INDEX IF NOT EXISTS
+        # for the new table would then do nothing
+        steps.extend(f"DROP INDEX IF EXISTS {index}" for index in live_indexes)
+        steps.append(f"ALTER TABLE {name} RENAME TO {legacy}")
+    else:
+        steps.append(f"DROP TABLE {name}")
+    steps.append(f"ALTER TABLE {temp} RENAME TO {name}")
+    return steps
+
+
+def diff(conn, table, version: int):
+    """ The SQL needed to bring `table` in line with its Columns """
+    name = table.__tablename__
+    columns, indexes = declared_schema(table)
+    live = live_schema(conn, name)
+    if live is None:
+        return [table.table_sql(exists_ok=False), *table.index_sql()]
+
+    live_columns, live_indexes = live
+    steps = []
+    missing = [column for column in table.columns if column.name not in live_columns]
+    changed = [column for column, spec in columns.items() if column in live_columns and live_columns[column] != spec]
+    if changed or not all(map(_addable, missing)):
+        steps.extend(_rebuild(conn, table, live_columns, live_indexes, version))
+        live_indexes = {}
+    else:
+        steps.extend(f"ALTER TABLE {name} ADD COLUMN {column._create_table()}" for column in missing)
+
+    steps.extend(f"DROP INDEX IF EXISTS {index}" for index in live_indexes if index not in indexes)
+    steps.extend(
+        sql for sql, index in zip(table.index_sql(), indexes)
+        if live_indexes.get(index) != indexes[index]
+    )
+    return steps
+
+
+def migrate(db: sqlite.Database, tables=None, *, verbose: bool = False):
+    """ Applies whatever the declared schema needs, returns the steps that were run """
+    tables = tables or sqlite.Table.all_tables()
+    conn = db.conn
+    wanted = fingerprint(tables)
+    steps = []
+    # every cluster process migrates on boot, the write lock makes sure only the first one does the work
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version, applied = current_version(conn)
+        if applied == wanted:
+            conn.execute("COMMIT")
+            if verbose:
+                print(f"[migrations] schema is current (v{version})")
+            return []
+
+        for table in tables:
+            steps.extend(diff(conn, table, version + 1))
+        for step in steps:
+            if verbose:
+                print(f"[migrations] {step}")
+            conn.execute(step)
+        conn.execute(
+            f"INSERT INTO {VERSION_TABLE} (version, fingerprint, applied_at, steps) VALUES (?, ?, ?, ?)",
+            (version + 1, wanted, time.time(), json.dumps(steps)),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    if verbose:
+        print(f"[migrations] migrated to v{version + 1} in {len(steps)} steps")
+    return steps
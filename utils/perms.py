@@ -0,0 +1,62 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+import discord
+
+# what edoC needs in a guild to work at all, name shown to users -> Permissions flag
+REQUIRED = {
+    'Add Reactions': 'add_reactions',
+    'View Audit Log': 'view_audit_log',
+    'Read Messages': 'read_messages',
+    'Send Messages': 'send_messages',
+    'Embed Links': 'embed_links',
+    'Attach Files': 'attach_files',
+    'read Message History': 'read_message_history',
+    'External Emojis': 'external_emojis',
+    'Connect': 'connect',
+    'Speak': 'speak',
+}
+REQUIRED_VALUE = discord.Permissions(**{flag: True for flag in REQUIRED.values()}).value
+
+
+class PermissionCache:
+    """
+    The bot's own guild permissions per guild, kept as the raw bitfield.
+
+    Checking a message is one dict lookup and one AND. Entries have to be
+    invalidated whenever the bot's roles, those roles or the guild change,
+    edoC does that from its role/member/guild update events.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def value(self, guild) -> int:
+        try:
+            value = self._values[guild.id]
+            self.hits += 1
+            return value
+        except KeyError:
+            self.misses += 1
+            value = self._values[guild.id] = guild.me.guild_permissions.value
+            return value
+
+    def has_required(self, guild) -> bool:
+        return self.value(guild) & REQUIRED_VALUE == REQUIRED_VALUE
+
+    def required(self, guild) -> dict:
+        """ {name: bool} for every required permission """
+        perms = discord.Permissions(self.value(guild))
+        return {name: getattr(perms, flag) for name, flag in REQUIRED.items()}
+
+    def invalidate(self, guild_id: int = None):
+        if guild_id is None:
+            self._values.clear()
+        else:
+            self._values.pop(guild_id, None)
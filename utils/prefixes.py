@@ -0,0 +1,93 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+import time
+
+from utils.config import prefixs
+
+
+class PrefixCache:
+    """
+    Every guild's prefixes, loaded with a single query.
+
+    matcher() hands back a ready made tuple (mention forms + the guild's
+    prefixes, longest first) that get_prefix can return as is, so a message
+    costs one dict lookup and one startswith pass. Anything that changes a
+    guild's prefixes has to go through add/remove/reset (or call invalidate).
+    """
+
+    def __init__(self, default: str):
+        self.default = default
+        self._prefixes = {}
+        self._matchers = {}
+        self._mentions = ()
+        self.hits = 0
+        self.misses = 0
+
+    def set_user(self, user_id: int):
+        """ The bot's own id, needed for the mention forms """
+        self._mentions = (f'<@!{user_id}> ', f'<@{user_id}> ')
+        self._matchers.clear()
+
+    async def load(self, db):
+        data = await prefixs.select(db, 'id', 'prefix', raw=True)
+        loaded = {}
+        for guild_id, prefix in data:
+            loaded.setdefault(guild_id, []).append(prefix)
+        self._prefixes = {guild_id: tuple(found) for guild_id, found in loaded.items()}
+        self._matchers.clear()
+        return len(data)
+
+    def get(self, guild_id: int = None):
+        """ The custom prefixes for a guild, or the default one """
+        return self._prefixes.get(guild_id) or (self.default,)
+
+    def matcher(self, guild_id: int = None):
+        try:
+            matcher = self._matchers[guild_id]
+            self.hits += 1
+            return matcher
+        except KeyError:
+            self.misses += 1
+            options = {*self._mentions, *self.get(guild_id)}
+            # longest first so '~' can't win over '~~'
+            matcher = self._matchers[guild_id] = tuple(sorted(options, key=len, reverse=True))
+            return matcher
+
+    def invalidate(self, guild_id: int = None):
+        """ Drop the compiled matcher for a guild, or every guild if no id is given """
+        if guild_id is None:
+            self._matchers.clear()
+        else:
+            self._matchers.pop(guild_id, None)
+
+    async def add(self, db, guild_id: int, prefix: str, author: int):
+        """ Adds to what the guild has now, on a guild without rows that's the default prefix """
+        if guild_id not in self._prefixes and prefix != self.default:
+            # no rows meant the default, store it too or the new prefix would replace it
+            await prefixs.insert(db, or_ignore=True, id=guild_id, prefix=self.default, timestamp=time.time())
+        await prefixs.insert(db, or_ignore=True, id=guild_id, prefix=prefix, author=author, timestamp=time.time())
+        self._prefixes[guild_id] = tuple(dict.fromkeys((*self.get(guild_id), prefix)))
+        self.invalidate(guild_id)
+
+    async def remove(self, db, guild_id: int, prefix: str) -> bool:
+        """ False if the guild didn't have that prefix """
+        # (id, prefix) is the primary key so it's one row or none
+        removed = await prefixs.delete(db, id=guild_id, prefix=prefix) == "DELETE 1"
+        remaining = tuple(p for p in self._prefixes.get(guild_id, ()) if p != prefix)
+        if remaining:
+            self._prefixes[guild_id] = remaining
+        else:
+            self._prefixes.pop(guild_id, None)
+        self.invalidate(guild_id)
+        return removed
+
+    async def reset(self, db, guild_id: int):
+        """ Back to just the default prefix """
+        await prefixs.delete(db, id=guild_id)
+        self._prefixes.pop(guild_id, None)
+        self.invalidate(guild_id)
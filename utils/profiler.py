@@ -0,0 +1,92 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+Statistical profiler for the running bot.
+
+A background thread reads sys._current_frames() every `interval` seconds and
+counts each thread's stack, so nothing has to be restarted under cProfile and
+the executor threads (translate, sqlite, ...) show up next to the loop.
+Output is the collapsed stack format ("thread;outer;...;inner count") that
+flamegraph.pl / speedscope / inferno read directly.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+ROOT = os.getcwd()
+# leaf frames of threads that are just waiting for work, left out of hottest()
+IDLE = ("select (selectors.py:", "wait (threading.py:", "_worker (thread.py:", "_worker (concurrent/futures/thread.py:")
+
+
+def _where(code) -> str:
+    path = code.co_filename
+    if path.startswith(ROOT):
+        path = os.path.relpath(path, ROOT)
+    elif "site-packages" in path:
+        path = path.split("site-packages", 1)[1].lstrip("\\/")
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class Profile:
+    def __init__(self, stacks: Counter, samples: int, duration: float, interval: float):
+        self.stacks = stacks
+        self.samples = samples
+        self.duration = duration
+        self.interval = interval
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def hottest(self, limit: int = 15, *, idle: bool = False):
+        """ [(function, self samples, total samples)] by self samples, the leaf frame is where time was spent """
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames or (not idle and frames[-1].startswith(IDLE)):
+                continue
+            own[frames[-1]] += count
+            # recursion shouldn't count a frame twice
+            for frame in set(frames):
+                total[frame] += count
+        return [(frame, count, total[frame]) for frame, count in own.most_common(limit)]
+
+
+class Sampler:
+    def __init__(self, interval: float = 0.01, *, max_depth: int = 128):
+        self.interval = interval
+        self.max_depth = max_depth
+
+    def _stack(self, frame):
+        frames = []
+        while frame is not None and len(frames) < self.max_depth:
+            frames.append(_where(frame.f_code))
+            frame = frame.f_back
+        frames.reverse()
+        return frames
+
+    def run(self, seconds: float) -> Profile:
+        """ Blocks for `seconds`, call it from a thread (asyncio.to_thread / run_in_executor) """
+        me = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        start = time.perf_counter()
+        deadline = start + seconds
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                name = names.get(ident, str(ident)).replace(";", ":").replace(" ", "_")
+                stacks[";".join((name, *self._stack(frame)))] += 1
+            samples += 1
+            time.sleep(self.interval)
+        return Profile(stacks, samples, time.perf_counter() - start, self.interval)
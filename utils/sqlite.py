@@ -5,10 +5,31 @@
 #  and is released under the "MIT License Agreement". Please see the LICENSE                       +
 #  file that should have been included as part of this package.                                    +
 # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+import asyncio
+import functools
+import itertools
+import keyword
+import operator
 import sqlite3
-from collections import OrderedDict
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+from utils.metrics import db_seconds
+
+DB_PATH = "data/db/database.db"
+# anything under "database" in config.json overrides these, see pragmas_from_config
+PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "mmap_size": 268435456,  # 256 mb
+    "cache_size": -65536,  # negative = KiB so 64 mb
+    "busy_timeout": 5000,
+}
 
 
 def dict_factory(cursor, row):
@@ -18,12 +39,153 @@ def dict_factory(cursor, row):
     return d
 
 
+class Row(tuple):
+    """
+    Base for the generated row types.
+
+    A plain tuple underneath, it also answers to row['column'], row.column,
+    keys()/values()/items() and get() so code written against dict rows keeps working.
+    """
+    __slots__ = ()
+    _fields = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                key = self._index[key]
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return self._fields
+
+    def values(self):
+        return tuple(self)
+
+    def items(self):
+        return zip(self._fields, self)
+
+    def _asdict(self):
+        return dict(zip(self._fields, self))
+
+    def __repr__(self):
+        values = " ".join(f"{name}={value!r}" for name, value in zip(self._fields, self))
+        return f"<{type(self).__qualname__} {values}>"
+
+
+_row_types = {}
+
+
+def row_type(name: str, fields):
+    """ Makes a Row subclass with a read-only property per field """
+    fields = tuple(fields)
+    dct = {"__slots__": (), "_fields": fields, "_index": {field: i for i, field in enumerate(fields)}}
+    for i, field in enumerate(fields):
+        # columns that would shadow a Row method are still reachable through row['name']
+        if field.isidentifier() and not keyword.iskeyword(field) and not hasattr(Row, field):
+            dct[field] = property(operator.itemgetter(i))
+    return type(name, (Row,), dct)
+
+
+def row_type_for(fields: tuple):
+    """ The cached row type for a result shape, tables register theirs so SELECT * gets it """
+    try:
+        return _row_types[fields]
+    except KeyError:
+        row = _row_types[fields] = row_type("Row", fields)
+        return row
+
+
+def typed(cursor, data):
+    """ Wraps what fetchall/fetchone gave back in the row type for the cursor's columns """
+    if data is None or cursor.description is None:
+        return data
+    row = row_type_for(tuple(column[0] for column in cursor.description))
+    if isinstance(data, tuple):
+        return row(data)
+    return list(map(row, data))
+
+
+def connect(path: str = DB_PATH, *, readonly: bool = False, pragmas: dict = None):
+    """ Opens a connection and applies `pragmas`, `readonly` ones can't change the journal mode """
+    conn = sqlite3.connect(
+        f"file:{path}?mode=ro" if readonly else path, uri=readonly,
+        isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False
+    )
+    for name, value in (pragmas or {}).items():
+        if readonly and name == "journal_mode":
+            continue
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def pragmas_from_config(config: dict):
+    """ PRAGMAS with the overrides from the "database" section of config.json """
+    overrides = config.get("database", {})
+    return {name: overrides.get(name, value) for name, value in PRAGMAS.items()}
+
+
+def status(sql: str, data):
+    """ Turns a finished cursor into a 'WORD count' status string """
+    status_word = sql.split(' ')[0].upper()
+    status_code = data.rowcount if data.rowcount > 0 else 0
+    if status_word == "SELECT":
+        status_code = len(data.fetchall())
+
+    return f"{status_word} {status_code}"
+
+
+ReconcileResult = namedtuple("ReconcileResult", "added stale removed")
+
+
+def reconcile(conn, table: str, ids, *, column: str = "id", defaults: dict = None, prune: bool = False):
+    """
+    Brings `table` in line with the live set of `ids` in one transaction.
+
+    The ids get staged into a temp table with a single executemany, then the
+    missing rows are inserted (with `defaults` as constant column values) and
+    the rows that are no longer live are counted, and deleted if `prune`.
+    """
+    defaults = defaults or {}
+    columns = ", ".join([column, *defaults])
+    values = ", ".join(["id", *("?" * len(defaults))])
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS live_ids (id INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.live_ids")
+        conn.executemany("INSERT OR IGNORE INTO temp.live_ids (id) VALUES (?)", ((i,) for i in ids))
+        # no OR IGNORE, the NOT IN already skips existing rows and anything else (NOT NULL) has to raise
+        added = conn.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {values} FROM temp.live_ids "
+            f"WHERE id NOT IN (SELECT {column} FROM {table})", tuple(defaults.values())
+        ).rowcount
+        stale = conn.execute(
+            f"SELECT COUNT(*) AS stale FROM {table} WHERE {column} NOT IN (SELECT id FROM temp.live_ids)"
+        ).fetchone()[0]
+        removed = 0
+        if prune:
+            removed = conn.execute(
+                f"DELETE FROM {table} WHERE {column} NOT IN (SELECT id FROM temp.live_ids)"
+            ).rowcount
+        conn.execute("DELETE FROM temp.live_ids")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return ReconcileResult(added, stale, removed)
+
+
 class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect(
-            "data/db/database.db", isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES
-        )
-        self.conn.row_factory = dict_factory
+    def __init__(self, path: str = DB_PATH, *, pragmas: dict = None):
+        self.conn = connect(path, pragmas=pragmas)
         self.db = self.conn.cursor()
 
     def execute(self, sql: str, prepared: tuple = (), commit: bool = True):
@@ -33,22 +195,26 @@ class Database:
         except Exception as e:
             return f"{type(e).__name__}: {e}"
 
-        status_word = sql.split(' ')[0].upper()
-        status_code = data.rowcount if data.rowcount > 0 else 0
-        if status_word == "SELECT":
-            status_code = len(data.fetchall())
+        return status(sql, data)
 
-        return f"{status_word} {status_code}"
+    def executemany(self, sql: str, prepared: list = ()):
+        """ Execute SQL command once for every set of args in 'prepared' """
+        try:
+            data = self.db.executemany(sql, prepared)
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
 
-    def fetch(self, sql: str, prepared: tuple = ()):
-        """ Fetch DB data with args for 'Prepared Statements' """
+        return status(sql, data)
+
+    def fetch(self, sql: str, prepared: tuple = (), raw: bool = False):
+        """ Fetch DB data with args for 'Prepared Statements', raw=True skips the row types """
         data = self.db.execute(sql, prepared).fetchall()
-        return data
+        return data if raw else typed(self.db, data)
 
-    def fetchrow(self, sql: str, prepared: tuple = ()):
+    def fetchrow(self, sql: str, prepared: tuple = (), raw: bool = False):
         """ Fetch DB row (one row only) with args for 'Prepared Statements' """
         data = self.db.execute(sql, prepared).fetchone()
-        return data
+        return data if raw else typed(self.db, data)
 
     def commit(self):
         self.conn.commit()
@@ -56,6 +222,231 @@ class Database:
     def autosave(self, sched):
         sched.add_job(self.commit, CronTrigger(second=1))
 
+    def close(self):
+        self.conn.close()
+
+
+class AsyncDatabase:
+    """
+    Awaitable version of Database, nothing here touches sqlite on the event loop.
+
+    Writes (execute/executemany/commit) are queued on a single writer thread so
+    they keep their order, reads (fetch/fetchrow) go to a small pool of reader
+    threads. Every thread owns its own connection, the readers' are read-only
+    so with WAL on they never wait behind a write.
+    """
+
+    def __init__(self, path: str = DB_PATH, *, readers: int = 4, pragmas: dict = None):
+        self.path = path
+        self.pragmas = PRAGMAS if pragmas is None else pragmas
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer",
+                                          initializer=self._open, initargs=(False,))
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="sqlite-reader",
+                                           initializer=self._open, initargs=(True,))
+        # the writer has to create the file and switch it to WAL before any reader opens it
+        self._writer.submit(self._connection).result()
+        self.writes = WriteQueue(self)
+
+    def _open(self, readonly):
+        conn = self._local.conn = connect(self.path, readonly=readonly, pragmas=self.pragmas)
+        with self._lock:
+            self._connections.append(conn)
+
+    def _connection(self):
+        return self._local.conn
+
+    def _execute(self, sql, prepared):
+        try:
+            data = self._connection().execute(sql, prepared)
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+
+        return status(sql, data)
+
+    def _executemany(self, sql, prepared):
+        try:
+            data = self._connection().executemany(sql, prepared)
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+
+        return status(sql, data)
+
+    def _execute_batch(self, batch):
+        conn = self._connection()
+        try:
+            # IMMEDIATE like _transaction, a deferred BEGIN can hit SQLITE_BUSY upgrading to a write lock
+            conn.execute("BEGIN IMMEDIATE")
+            for sql, group in itertools.groupby(batch, key=lambda statement: statement[0]):
+                conn.executemany(sql, [prepared for _, prepared in group])
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            # one bad statement shouldn't take the rest of the batch down with it
+            for sql, prepared in batch:
+                self._execute(sql, prepared)
+
+    def _fetch(self, sql, prepared, raw):
+        cursor = self._connection().execute(sql, prepared)
+        data = cursor.fetchall()
+        return data if raw else typed(cursor, data)
+
+    def _fetchrow(self, sql, prepared, raw):
+        cursor = self._connection().execute(sql, prepared)
+        data = cursor.fetchone()
+        return data if raw else typed(cursor, data)
+
+    def _commit(self):
+        self._connection().commit()
+
+    def _transaction(self, func, args):
+        conn = self._connection()
+        # IMMEDIATE takes the write lock up front, with several cluster processes on one file a
+        # deferred BEGIN can read a snapshot that's stale by the time it wants to write
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(conn, *args)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def _reconcile(self, table, ids, kwargs):
+        return reconcile(self._connection(), table, ids, **kwargs)
+
+    def _checkpoint(self, mode):
+        return self._connection().execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+
+    async def _run(self, executor, func, *args):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(executor, functools.partial(func, *args))
+        finally:
+            db_seconds.observe(time.perf_counter() - start, op=func.__name__.lstrip("_"))
+
+    async def execute(self, sql: str, prepared: tuple = (), commit: bool = True):
+        """ Execute SQL command with args for 'Prepared Statements' """
+        return await self._run(self._writer, self._execute, sql, prepared)
+
+    async def executemany(self, sql: str, prepared: list = ()):
+        """ Execute SQL command once for every set of args in 'prepared' """
+        return await self._run(self._writer, self._executemany, sql, list(prepared))
+
+    async def fetch(self, sql: str, prepared: tuple = (), raw: bool = False):
+        """ Fetch DB data with args for 'Prepared Statements', raw=True skips the row types """
+        return await self._run(self._readers, self._fetch, sql, prepared, raw)
+
+    async def fetchrow(self, sql: str, prepared: tuple = (), raw: bool = False):
+        """ Fetch DB row (one row only) with args for 'Prepared Statements' """
+        return await self._run(self._readers, self._fetchrow, sql, prepared, raw)
+
+    async def commit(self):
+        await self._run(self._writer, self._commit)
+
+    async def transaction(self, func, *args):
+        """ Runs func(conn, *args) on the writer thread inside a single transaction """
+        return await self._run(self._writer, self._transaction, func, args)
+
+    async def reconcile(self, table: str, ids, **kwargs):
+        """ Runs utils.sqlite.reconcile on the writer thread, see it for the kwargs """
+        return await self._run(self._writer, self._reconcile, table, list(ids), kwargs)
+
+    async def checkpoint(self, mode: str = "PASSIVE"):
+        """ Copies the WAL back into the main db file, returns sqlite's busy/log/checkpointed row """
+        return await self._run(self._writer, self._checkpoint, mode)
+
+    def autosave(self, sched):
+        sched.add_job(self.commit, CronTrigger(second=1))
+
+    def schedule_checkpoint(self, sched, minutes: float = 5):
+        sched.add_job(self.checkpoint, IntervalTrigger(minutes=minutes))
+
+    async def close(self):
+        """ Flushes the write queue, waits for queued writes to finish then closes every connection """
+        await self.writes.close()
+        if self.pragmas.get("journal_mode", "").lower() == "wal":
+            await self.checkpoint("TRUNCATE")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._writer.shutdown)
+        await loop.run_in_executor(None, self._readers.shutdown)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+class WriteQueue:
+    """
+    Write-behind queue for writes nobody has to wait on.
+
+    put() only appends to a list, pending statements are written in a single
+    transaction (consecutive identical statements through executemany) once
+    `max_size` are pending or every `interval` seconds, whichever comes first.
+    """
+
+    def __init__(self, db: AsyncDatabase, *, max_size: int = 500, interval: float = 1.0):
+        self.db = db
+        self.max_size = max_size
+        self.interval = interval
+        self.flushed = 0
+        self._pending = []
+        self._wakeup = None
+        self._task = None
+        # batches already taken out of _pending that the writer hasn't finished yet
+        self._writing = set()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, sql: str, prepared: tuple = ()):
+        """ Queue a write, has to be called from inside the event loop """
+        self._pending.append((sql, tuple(prepared)))
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._flusher())
+        if len(self._pending) >= self.max_size:
+            self._wakeup.set()
+
+    async def _flusher(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """ Writes everything pending right now, returns how many statements that was """
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, []
+        # shielded, cancelling whoever called flush (close() cancels the flusher) mustn't drop the batch
+        write = asyncio.ensure_future(self.db._run(self.db._writer, self.db._execute_batch, batch))
+        self._writing.add(write)
+        write.add_done_callback(self._writing.discard)
+        await asyncio.shield(write)
+        self.flushed += len(batch)
+        return len(batch)
+
+    async def close(self):
+        """ Stops the background flusher and writes whatever is left """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._writing:
+            await asyncio.gather(*self._writing)
+        await self.flush()
+
 
 class Column:
     def __init__(self, column_type: str, primary_key: bool = False, index: bool = False,
@@ -71,19 +462,24 @@ class Column:
         if sum(map(bool, (unique, primary_key, default is not None))) > 1:
             raise SyntaxError("'unique', 'primary_key', and 'default' are mutually exclusive.")
 
+    @property
+    def default_sql(self):
+        """ The DEFAULT expression as it goes in the CREATE TABLE, None without a default """
+        default = self.default
+        if default is None:
+            return None
+        if isinstance(default, str):
+            return f"'{default}'"
+        if isinstance(default, bool):
+            return str(default).upper()
+        return f"({default})"
+
     def _create_table(self):
         builder = []
         builder.append(f"'{self.name}' {self.column_type}")
 
-        default = self.default
-        if default:
-            builder.append("DEFAULT")
-            if isinstance(default, str):
-                builder.append(f"'{default}'")
-            elif isinstance(default, bool):
-                builder.append(str(default).upper())
-            else:
-                builder.append(f"({default})")
+        if self.default is not None:
+            builder.append(f"DEFAULT {self.default_sql}")
         elif self.unique:
             builder.append("UNIQUE")
         if not self.nullable:
@@ -118,6 +514,11 @@ class TableMeta(type):
                 columns.append(value)
 
         dct["columns"] = columns
+        if columns:
+            fields = tuple(column.name for column in columns)
+            row = dct["Row"] = row_type("Row", fields)
+            row.__qualname__ = f"{name}.Row"
+            _row_types[fields] = row
         return super().__new__(cls, name, parents, dct)
 
     def __init__(self, name, parents, dct, **kwargs):
@@ -126,15 +527,14 @@ class TableMeta(type):
 
 class Table(metaclass=TableMeta):
     @classmethod
-    def create_table(cls, *, exists_ok: bool = True):
-        """ Generate a CREATE TABLE command """
-        statements = []
+    def table_sql(cls, *, exists_ok: bool = True, name: str = None):
+        """ Generate the CREATE TABLE statement on its own, `name` defaults to the table's """
         builder = ["CREATE TABLE"]
 
         if exists_ok:
             builder.append("IF NOT EXISTS")
 
-        builder.append(cls.__tablename__)
+        builder.append(name or cls.__tablename__)
         column_creations = []
         primary_keys = []
 
@@ -143,32 +543,141 @@ class Table(metaclass=TableMeta):
             if col.primary_key:
                 primary_keys.append(col.name)
 
-        column_creations.append("PRIMARY KEY (%s)" % ", ".join(primary_keys))
+        if primary_keys:
+            column_creations.append("PRIMARY KEY (%s)" % ", ".join(primary_keys))
         builder.append("(%s)" % ", ".join(column_creations))
-        statements.append(" ".join(builder) + ";")
+        return " ".join(builder) + ";"
 
-        for column in cls.columns:
-            if column.index:
-                fmt = "CREATE INDEX IF NOT EXISTS {1.index_name} ON {0} ({1.name});".format(cls.__tablename__, column)
-                statements.append(fmt)
+    @classmethod
+    def index_sql(cls):
+        """ Generate a CREATE INDEX statement for every index=True column """
+        return [
+            "CREATE INDEX IF NOT EXISTS {1.index_name} ON {0} ({1.name});".format(cls.__tablename__, column)
+            for column in cls.columns if column.index
+        ]
 
-        return "\n".join(statements)
+    @classmethod
+    def create_table(cls, *, exists_ok: bool = True):
+        """ Generate a CREATE TABLE command """
+        return "\n".join([cls.table_sql(exists_ok=exists_ok), *cls.index_sql()])
 
     @classmethod
-    def create(cls, *, verbose: bool = False):
-        sql = cls.create_table(exists_ok=True)
-        if verbose:
-            print(sql)
-        Database().execute(sql)
+    def create(cls, *, db: Database = None, verbose: bool = False):
+        db = db or Database()
+        # sqlite3 only runs one statement per execute
+        for sql in [cls.table_sql(exists_ok=True), *cls.index_sql()]:
+            if verbose:
+                print(sql)
+            db.execute(sql)
         return True
 
     @classmethod
-    def drop(cls, *, filename: str = None, verbose: bool = False):
-        sql = "DROP TABLE {0} CASCADE;".format(cls.__tablename__)
+    def drop(cls, *, db: Database = None, verbose: bool = False):
+        sql = "DROP TABLE IF EXISTS {0};".format(cls.__tablename__)
         if verbose:
             print(sql)
-        Database(filename=filename).execute(sql)
+        (db or Database()).execute(sql)
         return True
+
+    @classmethod
+    def _check_columns(cls, columns):
+        names = {column.name for column in cls.columns}
+        for name in columns:
+            if name not in names:
+                raise SyntaxError(f"{name!r} is not a column of {cls.__tablename__}")
+
+    # The builders are cached per shape so hot paths hand sqlite3 the exact same string
+    # every time, which lets the connection's statement cache reuse the prepared statement.
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def select_sql(cls, columns: tuple = (), where: tuple = (), order_by: str = None, limit: bool = False):
+        """ Generate a SELECT command, `where` columns are ANDed together as 'column = ?' """
+        cls._check_columns((*columns, *where))
+        builder = [f"SELECT {', '.join(columns) or '*'} FROM {cls.__tablename__}"]
+        if where:
+            builder.append("WHERE " + " AND ".join(f"{name} = ?" for name in where))
+        if order_by:
+            builder.append(f"ORDER BY {order_by}")
+        if limit:
+            builder.append("LIMIT ?")
+        return " ".join(builder)
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def insert_sql(cls, columns: tuple, *, or_ignore: bool = False):
+        """ Generate an INSERT command for `columns` """
+        cls._check_columns(columns)
+        verb = "INSERT OR IGNORE" if or_ignore else "INSERT"
+        return f"{verb} INTO {cls.__tablename__} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def delete_sql(cls, where: tuple):
+        """ Generate a DELETE command, `where` columns are ANDed together as 'column = ?' """
+        if not where:
+            raise SyntaxError("refusing to build a DELETE without a WHERE")
+        cls._check_columns(where)
+        return f"DELETE FROM {cls.__tablename__} WHERE " + " AND ".join(f"{name} = ?" for name in where)
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def upsert_sql(cls, columns: tuple):
+        """ Generate an INSERT that updates the given non primary key columns on a primary key conflict """
+        primary_keys = [column.name for column in cls.columns if column.primary_key]
+        if not primary_keys:
+            raise SyntaxError(f"{cls.__tablename__} has no primary key to upsert on")
+        updates = [name for name in columns if name not in primary_keys]
+        action = "DO UPDATE SET " + ", ".join(f"{name} = excluded.{name}" for name in updates) if updates else "DO NOTHING"
+        return f"{cls.insert_sql(columns)} ON CONFLICT ({', '.join(primary_keys)}) {action}"
+
+    @classmethod
+    async def select(cls, db, *columns, where: dict = None, order_by: str = None, limit: int = None,
+                     raw: bool = False):
+        """ SELECT `columns` (all of them if none are given) matching every `where` column = value """
+        where = where or {}
+        sql = cls.select_sql(columns, tuple(where), order_by, limit is not None)
+        prepared = (*where.values(), limit) if limit is not None else tuple(where.values())
+        return await db.fetch(sql, prepared, raw=raw)
+
+    @classmethod
+    async def insert(cls, db, *, or_ignore: bool = False, behind: bool = False, **values):
+        """ Insert one row, behind=True hands it to the db's write-behind queue instead of waiting """
+        sql = cls.insert_sql(tuple(values), or_ignore=or_ignore)
+        if behind:
+            return db.writes.put(sql, tuple(values.values()))
+        return await db.execute(sql, tuple(values.values()))
+
+    @classmethod
+    async def upsert(cls, db, *, behind: bool = False, **values):
+        """ Insert one row or update it if its primary key already exists """
+        sql = cls.upsert_sql(tuple(values))
+        if behind:
+            return db.writes.put(sql, tuple(values.values()))
+        return await db.execute(sql, tuple(values.values()))
+
+    @classmethod
+    async def delete(cls, db, **where):
+        """ Delete the rows matching every column = value """
+        return await db.execute(cls.delete_sql(tuple(where)), tuple(where.values()))
+
+    @classmethod
+    async def bulk_insert(cls, db, rows, *, or_ignore: bool = False):
+        """ Insert many rows (dicts), one executemany per distinct set of columns """
+        return await cls._bulk(db, rows, functools.partial(cls.insert_sql, or_ignore=or_ignore))
+
+    @classmethod
+    async def bulk_upsert(cls, db, rows):
+        """ Upsert many rows (dicts), one executemany per distinct set of columns """
+        return await cls._bulk(db, rows, cls.upsert_sql)
+
+    @classmethod
+    async def _bulk(cls, db, rows, build):
+        shapes = {}
+        for row in rows:
+            shapes.setdefault(tuple(row), []).append(tuple(row.values()))
+        return [await db.executemany(build(columns), prepared) for columns, prepared in shapes.items()]
+
     @classmethod
     def all_tables(cls):
         return cls.__subclasses__()
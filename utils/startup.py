@@ -0,0 +1,85 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+Startup timeline, from process start to the first command served.
+
+index.py makes one of these before importing anything heavy, times its own
+imports and the core cogs with step()/load_extension(), and defers the heavy
+or optional cogs with defer(). edoC loads those after on_ready, one per loop
+iteration so the shards keep heartbeating, then prints the timeline.
+"""
+import asyncio
+import sys
+import time
+from contextlib import contextmanager
+
+import psutil
+
+# heavy or optional, nothing else depends on them being there at on_ready
+DEFERRED_COGS = ("Music", "Skyblock", "Image")
+
+
+class Startup:
+    def __init__(self):
+        self._start = time.perf_counter()
+        # everything that ran before this object existed (interpreter, site, ...)
+        self.before = max(time.time() - psutil.Process().create_time(), 0.0)
+        self.events = []
+        self.deferred = []
+        self.milestones = {}
+
+    def now(self) -> float:
+        """ Seconds since the process started """
+        return self.before + time.perf_counter() - self._start
+
+    @contextmanager
+    def step(self, name: str):
+        started = self.now()
+        modules = len(sys.modules)
+        try:
+            yield
+        finally:
+            self.events.append((started, name, self.now() - started, len(sys.modules) - modules))
+
+    def mark(self, name: str):
+        """ Records a milestone once, returns False if it was already recorded """
+        if name in self.milestones:
+            return False
+        self.milestones[name] = self.now()
+        self.events.append((self.milestones[name], name, None, 0))
+        return True
+
+    def load_extension(self, bot, name: str):
+        with self.step(f"load {name}"):
+            bot.load_extension(name)
+
+    def defer(self, name: str):
+        self.deferred.append(name)
+
+    async def load_deferred(self, bot):
+        """ Loads every deferred extension, one per loop iteration, returns the ones that failed """
+        failed = {}
+        while self.deferred:
+            name = self.deferred.pop(0)
+            try:
+                self.load_extension(bot, name)
+            except Exception as e:
+                failed[name] = e
+            await asyncio.sleep(0)
+        self.mark("deferred cogs loaded")
+        return failed
+
+    def render(self) -> str:
+        lines = [f"{'at':>8} {'took':>8} {'mods':>5}  step",
+                 f"{0:7.2f}s {self.before * 1000:6.0f}ms {'':>5}  interpreter + index.py imports"]
+        for started, name, took, modules in sorted(self.events, key=lambda event: event[0]):
+            if took is None:
+                lines.append(f"{started:7.2f}s {'':>8} {'':>5}  -- {name}")
+            else:
+                lines.append(f"{started:7.2f}s {took * 1000:6.0f}ms {modules:>5}  {name}")
+        return "\n".join(lines)
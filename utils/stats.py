@@ -0,0 +1,78 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+import json
+from os.path import isfile
+
+from utils.config import bot_data
+
+SEED_FILE = "tempdb.json"
+
+
+class StatsStore:
+    """
+    Small persistent key-value store for the bot's running stats.
+
+    Reads never leave memory. set() only marks a key dirty when its value
+    actually changed, flush() upserts just those keys through the db's
+    write-behind queue so they land in one transaction. Values are stored as JSON.
+    Counters every cluster adds to go through add(), they're written as an
+    increment so one cluster's flush doesn't overwrite another's.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._dirty = set()
+        self._deltas = {}
+
+    def load(self, db, seed: str = SEED_FILE):
+        """ Read everything with a blocking utils.sqlite.Database, the first boot imports `seed` """
+        rows = db.fetch(bot_data.select_sql())
+        self._data = {row.name: json.loads(row.value) for row in rows}
+        if not self._data and isfile(seed):
+            with open(seed, encoding='utf8') as file:
+                self._data = json.load(file)
+            self._dirty = set(self._data)
+        return self
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def set(self, key, value):
+        if key not in self._data or self._data[key] != value:
+            self._data[key] = value
+            self._dirty.add(key)
+
+    def add(self, key, delta: int):
+        """ Bump a counter by `delta`, flush() adds it to whatever is stored rather than replacing it """
+        if delta:
+            self._data[key] = int(self._data.get(key, 0)) + delta
+            self._deltas[key] = self._deltas.get(key, 0) + delta
+
+    @property
+    def dirty(self):
+        return len(self._dirty) + len(self._deltas)
+
+    def flush(self, db):
+        """ Queue the changed keys on `db` (a utils.sqlite.AsyncDatabase), returns how many there were """
+        dirty, self._dirty = self._dirty, set()
+        deltas, self._deltas = self._deltas, {}
+        sql = bot_data.upsert_sql(("name", "value"))
+        for key in dirty:
+            db.writes.put(sql, (key, json.dumps(self._data[key])))
+        # older rows hold the count as a JSON string ("123"), json_extract reads either form
+        increment = (f"{bot_data.insert_sql(('name', 'value'))} ON CONFLICT (name) DO UPDATE SET "
+                     "value = CAST(COALESCE(json_extract(value, '$'), 0) AS INTEGER) + excluded.value")
+        for key, delta in deltas.items():
+            db.writes.put(increment, (key, delta))
+        return len(dirty) + len(deltas)
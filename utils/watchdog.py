@@ -0,0 +1,129 @@
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#  Copyright (c) 2021. Jason Cameron                                                               +
+#  All rights reserved.                                                                            +
+#  This file is part of the edoC discord bot project ,                                             +
+#  and is released under the "MIT License Agreement". Please see the LICENSE                       +
+#  file that should have been included as part of this package.                                    +
+# ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+"""
+Event loop lag watchdog.
+
+A task on the loop wakes up every `interval` and records how late it was into
+edoc_loop_lag_seconds. A plain thread watches that task's heartbeat, once the
+loop has been stuck for longer than `threshold` it grabs the loop thread's
+current stack (the code that's blocking right now) and the running task, and
+turns that into a StallReport. Tasks started for commands are labelled with
+track(ctx) so a report says which command it was, anything else falls back
+to the task name ("discord.py: on_message" and friends).
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+
+from utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+loop_lag = registry.histogram("edoc_loop_lag_seconds", "How late the watchdog's sleep woke up", buckets=LAG_BUCKETS)
+loop_stalls = registry.counter("edoc_loop_stalls_total", "Times the loop was blocked past the threshold")
+
+
+class StallReport:
+    __slots__ = ("when", "label", "stack", "duration")
+
+    def __init__(self, when: float, label: str, stack: list):
+        self.when = when
+        self.label = label
+        self.stack = stack
+        # filled in once the loop gets going again
+        self.duration = None
+
+    def format(self, frames: int = 8) -> str:
+        took = f"{self.duration * 1000:.0f} ms" if self.duration is not None else "still blocked"
+        return f"{self.label} blocked the loop for {took}\n" + "".join(self.stack[-frames:])
+
+
+class LoopWatchdog:
+    def __init__(self, *, interval: float = 0.1, threshold: float = 0.25, keep: int = 50, samples: int = 3000):
+        self.interval = interval
+        self.threshold = threshold
+        self.reports = deque(maxlen=keep)
+        # raw lag samples for percentiles, 3000 * 0.1s is about the last 5 minutes
+        self.samples = deque(maxlen=samples)
+        self._labels = weakref.WeakKeyDictionary()
+        self._loop = None
+        self._loop_thread = None
+        self._beat = 0.0
+        self._open = None
+        self._task = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """ Has to be called from the loop that should be watched """
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._ticker(), name="loop-watchdog")
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def track(self, ctx):
+        """ Labels the current task with the command it's about to run """
+        task = asyncio.current_task()
+        if task is not None and ctx.command is not None:
+            where = ctx.guild.id if ctx.guild else "DM"
+            self._labels[task] = f"command {ctx.command.qualified_name} (guild {where}, user {ctx.author.id})"
+
+    async def _ticker(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(now - start - self.interval, 0.0)
+            self._beat = now
+            loop_lag.observe(lag)
+            self.samples.append(lag)
+            if self._open is not None:
+                report, self._open = self._open, None
+                report.duration = lag
+                log.warning("event loop stall: %s", report.format())
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            stalled = time.perf_counter() - self._beat - self.interval
+            if stalled > self.threshold and self._open is None:
+                self._open = self._capture()
+
+    def _capture(self):
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.format_stack(frame) if frame is not None else []
+        # the C implementation keeps the running task per loop in this dict as well
+        task = asyncio.tasks._current_tasks.get(self._loop)
+        if task is None:
+            label = "a callback"
+        else:
+            label = self._labels.get(task) or task.get_name()
+        report = StallReport(time.time(), label, stack)
+        self.reports.append(report)
+        loop_stalls.inc()
+        return report
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]